@@ -0,0 +1,1003 @@
+// AIB dashboard page script.
+// Inlined into the generated HTML by refresh_aib_dashboard.py after the
+// globals it provides: incidentData (dictionary-encoded incident groups),
+// dashboardMeta (date range and pre-formatted headline metrics for reset) and
+// weeklySummaries (precomputed insights per week).
+
+// Typed array over a base64-encoded little-endian buffer from the generator
+function decodeColumn(b64, ArrayType) {
+    const binary = atob(b64);
+    const bytes = new Uint8Array(binary.length);
+    for (let i = 0; i < binary.length; i++) bytes[i] = binary.charCodeAt(i);
+    return new ArrayType(bytes.buffer);
+}
+
+// Incident groups as parallel columns (structure of arrays) - integer codes into
+// the label lists for the text fields, typed arrays for the numbers - so the
+// filter and aggregation loops below read contiguous memory instead of objects
+const labels = incidentData.labels;
+const siteId = decodeColumn(incidentData.site, Int32Array);
+const cellId = decodeColumn(incidentData.cell, Int32Array);
+const componentId = decodeColumn(incidentData.component, Int32Array);
+const weekId = decodeColumn(incidentData.wm_week, Int32Array);     // -1: no week
+const dateId = decodeColumn(incidentData.alarm_date, Int32Array);  // -1: no date
+const durationMins = decodeColumn(incidentData.duration_mins, Float64Array);
+const blocking = decodeColumn(incidentData.blocking, Uint8Array);
+const starving = decodeColumn(incidentData.starving, Uint8Array);
+const alarmCount = decodeColumn(incidentData.n, Int32Array);  // alarms in the group
+const N = alarmCount.length;
+const allRows = Int32Array.from({ length: N }, (_, i) => i);
+
+// Alarm texts are cut to 200 characters and their display form to 50, so
+// distinct codes can share a label; each label gets one dense id
+function dedupeLabels(list) {
+    const ids = new Int32Array(list.length);
+    const unique = [];
+    const seen = new Map();
+    list.forEach((label, code) => {
+        if (!seen.has(label)) {
+            seen.set(label, unique.length);
+            unique.push(label);
+        }
+        ids[code] = seen.get(label);
+    });
+    return { ids, labels: unique };
+}
+const alarmTexts = dedupeLabels(labels.alarm_text);
+const alarmShortTexts = dedupeLabels(labels.alarm_text_short);
+const alarmTextCodes = decodeColumn(incidentData.alarm_text, Int32Array);
+const alarmId = alarmTextCodes.map(code => alarmTexts.ids[code]);
+const alarmShortId = alarmTextCodes.map(code => alarmShortTexts.ids[code]);
+// Display form (50 characters) of each alarmTexts label
+const alarmTextShort = [];
+labels.alarm_text_short.forEach((text, code) => { alarmTextShort[alarmTexts.ids[code]] = text; });
+
+const labelIds = list => new Map(list.map((label, id) => [label, id]));
+const weekIds = labelIds(labels.wm_week);
+const siteIds = labelIds(labels.site);
+const cellIds = labelIds(labels.cell);
+const componentIds = labelIds(labels.component);
+
+// Row indices per week, site and cell, plus the dated rows in date order -
+// built once so a filter only visits the rows its most selective part allows
+function indexBy(codes, size) {
+    const index = Array.from({ length: size }, () => []);
+    for (let i = 0; i < N; i++) {
+        if (codes[i] >= 0) index[codes[i]].push(i);
+    }
+    return index;
+}
+const byWeek = indexBy(weekId, labels.wm_week.length);
+const bySite = indexBy(siteId, labels.site.length);
+const byCell = indexBy(cellId, labels.cell.length);
+const undatedRows = [];
+const datedRows = [];
+for (let i = 0; i < N; i++) (dateId[i] >= 0 ? datedRows : undatedRows).push(i);
+// Dates as YYYYMMDD integers, so date filters compare ints rather than strings;
+// 0 for an undated row or an empty date input
+const dateKey = value => value ? +value.replace(/-/g, '') : 0;
+const dateKeys = labels.alarm_date.map(dateKey);
+const dateInt = Int32Array.from(dateId, code => code >= 0 ? dateKeys[code] : 0);
+datedRows.sort((a, b) => dateInt[a] - dateInt[b] || a - b);
+
+// First position in datedRows whose date key is past value (or at it, if inclusive is false)
+function dateBound(value, inclusive) {
+    let lo = 0, hi = datedRows.length;
+    while (lo < hi) {
+        const mid = (lo + hi) >> 1;
+        const date = dateInt[datedRows[mid]];
+        if (inclusive ? date <= value : date < value) lo = mid + 1; else hi = mid;
+    }
+    return lo;
+}
+
+// Ascending row indices that can pass the week/site/cell/date filters, taken
+// from the smallest index list; null when none of those filters is set.
+// weekCode is null for all weeks, siteCodes/cellCodes null for all sites/cells,
+// startKey/endKey 0 for an open end of the date range
+function candidateRows(weekCode, siteCodes, cellCodes, startKey, endKey) {
+    const options = [];
+    const union = (index, codes) => {
+        const lists = codes.map(code => index[code] || []);
+        return { size: lists.reduce((sum, list) => sum + list.length, 0),
+                 rows: () => lists.length === 1 ? lists[0] : [].concat(...lists).sort((a, b) => a - b) };
+    };
+    if (weekCode !== null) options.push(union(byWeek, [weekCode]));
+    if (siteCodes) options.push(union(bySite, siteCodes));
+    if (cellCodes) options.push(union(byCell, cellCodes));
+    if (startKey || endKey) {
+        // Rows without a date pass the date filter, as in the per-row check
+        const lo = startKey ? dateBound(startKey, false) : 0;
+        const hi = endKey ? dateBound(endKey, true) : datedRows.length;
+        options.push({ size: undatedRows.length + Math.max(hi - lo, 0),
+                       rows: () => undatedRows.concat(datedRows.slice(lo, Math.max(hi, lo))).sort((a, b) => a - b) });
+    }
+    if (options.length === 0) return null;
+    return options.reduce((best, option) => option.size < best.size ? option : best).rows();
+}
+
+// Tick spacing for an axis up to max, about five steps of 1, 2 or 5 x 10^n
+function niceStep(max) {
+    const raw = Math.max(max / 5, 1);
+    const magnitude = 10 ** Math.floor(Math.log10(raw));
+    const f = raw / magnitude;
+    return (f <= 1 ? 1 : f <= 2 ? 2 : f <= 5 ? 5 : 10) * magnitude;
+}
+
+// Plain bar chart drawn straight onto its canvas, for the cell and alarm charts:
+// at most 15 bars, so no animation, parsing, plugins or scene graph is needed.
+// It keeps the slice of the Chart.js API the page uses - data.labels,
+// data.datasets[0].data/backgroundColor, update() and onClick(event, [{ index }])
+class MiniBarChart {
+    constructor(canvas, { labels, data, backgroundColor, borderColor = null, horizontal = false, onClick = null }) {
+        this.canvas = canvas;
+        this.ctx = canvas.getContext('2d');
+        this.data = { labels, datasets: [{ data, backgroundColor }] };
+        this.borderColor = borderColor;
+        this.horizontal = horizontal;
+        this.layout = null;
+        canvas.style.display = 'block';
+        canvas.style.width = '100%';
+        canvas.style.height = '100%';
+        canvas.addEventListener('click', event => {
+            const index = this.barAt(event.offsetX, event.offsetY);
+            if (onClick && index >= 0) onClick(event, [{ index, datasetIndex: 0 }]);
+        });
+        // Cursor + native tooltip in place of Chart.js hover handling
+        canvas.addEventListener('mousemove', event => {
+            const index = this.barAt(event.offsetX, event.offsetY);
+            canvas.style.cursor = onClick && index >= 0 ? 'pointer' : 'default';
+            canvas.title = index >= 0 ? `${this.data.labels[index]}: ${this.data.datasets[0].data[index].toLocaleString()}` : '';
+        });
+        window.addEventListener('resize', () => this.update());
+        this.update();
+    }
+
+    // Index of the bar slot under canvas point (x, y), or -1
+    barAt(x, y) {
+        const layout = this.layout;
+        if (!layout) return -1;
+        const inPlot = x >= layout.left && x <= layout.right && y >= layout.top && y <= layout.bottom;
+        const index = Math.floor((this.horizontal ? y - layout.top : x - layout.left) / layout.slot);
+        return inPlot && index < this.data.labels.length ? index : -1;
+    }
+
+    update() {
+        const { canvas, ctx, horizontal } = this;
+        const labels = this.data.labels;
+        const values = this.data.datasets[0].data;
+        const colors = this.data.datasets[0].backgroundColor;
+        const width = canvas.clientWidth, height = canvas.clientHeight;
+        const ratio = window.devicePixelRatio || 1;
+        canvas.width = width * ratio;
+        canvas.height = height * ratio;
+        ctx.setTransform(ratio, 0, 0, ratio, 0, 0);
+        ctx.clearRect(0, 0, width, height);
+        ctx.font = '12px "Helvetica Neue", Helvetica, Arial, sans-serif';
+
+        const step = niceStep(Math.max(0, ...values));
+        const axisMax = Math.max(Math.ceil(Math.max(0, ...values) / step), 1) * step;
+        const ticks = [];
+        for (let v = 0; v <= axisMax; v += step) ticks.push(v);
+
+        // Horizontal bars: labels on the left, cut to fit; vertical: value ticks on the left
+        const fit = (text, room) => {
+            if (ctx.measureText(text).width <= room) return text;
+            while (text.length > 1 && ctx.measureText(text + '...').width > room) text = text.slice(0, -1);
+            return text + '...';
+        };
+        const labelRoom = Math.max(...labels.map(label => ctx.measureText(label).width), 0);
+        const left = horizontal ? Math.min(labelRoom, width * 0.45) + 12
+                                : ctx.measureText(axisMax.toLocaleString()).width + 12;
+        const layout = { left, right: width - 10, top: 10, bottom: height - 24 };
+        layout.slot = (horizontal ? layout.bottom - layout.top : layout.right - layout.left) / Math.max(labels.length, 1);
+        this.layout = layout;
+        const scale = v => v / axisMax * (horizontal ? layout.right - layout.left : layout.bottom - layout.top);
+
+        // Grid lines and value ticks
+        ctx.strokeStyle = 'rgba(0, 0, 0, 0.1)';
+        ctx.fillStyle = '#666';
+        ctx.lineWidth = 1;
+        ticks.forEach(v => {
+            ctx.beginPath();
+            if (horizontal) {
+                const x = layout.left + scale(v);
+                ctx.moveTo(x, layout.top);
+                ctx.lineTo(x, layout.bottom);
+                ctx.textAlign = 'center';
+                ctx.textBaseline = 'top';
+                ctx.fillText(v.toLocaleString(), x, layout.bottom + 6);
+            } else {
+                const y = layout.bottom - scale(v);
+                ctx.moveTo(layout.left, y);
+                ctx.lineTo(layout.right, y);
+                ctx.textAlign = 'right';
+                ctx.textBaseline = 'middle';
+                ctx.fillText(v.toLocaleString(), layout.left - 6, y);
+            }
+            ctx.stroke();
+        });
+
+        // Bars and category labels
+        const thickness = layout.slot * 0.72;
+        for (let i = 0; i < labels.length; i++) {
+            const start = (horizontal ? layout.top : layout.left) + i * layout.slot + (layout.slot - thickness) / 2;
+            const length = scale(values[i]);
+            const [x, y, w, h] = horizontal ? [layout.left, start, length, thickness]
+                                            : [start, layout.bottom - length, thickness, length];
+            ctx.fillStyle = typeof colors === 'string' ? colors : colors[i];
+            ctx.fillRect(x, y, w, h);
+            if (this.borderColor) {
+                ctx.strokeStyle = this.borderColor;
+                ctx.strokeRect(x + 0.5, y + 0.5, Math.max(w - 1, 0), Math.max(h - 1, 0));
+            }
+            ctx.fillStyle = '#666';
+            if (horizontal) {
+                ctx.textAlign = 'right';
+                ctx.textBaseline = 'middle';
+                ctx.fillText(fit(labels[i], layout.left - 12), layout.left - 6, start + thickness / 2);
+            } else {
+                ctx.textAlign = 'center';
+                ctx.textBaseline = 'top';
+                ctx.fillText(fit(labels[i], layout.slot), start + thickness / 2, layout.bottom + 6);
+            }
+        }
+    }
+}
+
+let cellChart = null;
+let componentChart = null;
+let alarmChart = null;
+let selectedCell = null;
+let selectedComponent = null;
+let lastFilteredRows = null;
+let cellDrillRows = null;  // lastFilteredRows split by cell, built on the first drill-down
+// Filtered rows + computeAll summary per filter/selection signature, most
+// recently used last; re-selecting a recent combination skips both
+const filterCache = new Map();
+const FILTER_CACHE_SIZE = 32;
+
+// The Pareto chart is redrawn on every filter change and drill-down click; with no
+// animations each redraw is a single frame. 'none' updates skip the transition
+const STATIC_CHART_OPTIONS = {
+    animation: false,
+    animations: { colors: false, numbers: false },
+    transitions: { active: { animation: { duration: 0 } } },
+    normalized: true  // one value per label index, in label order
+};
+
+// Calculate cumulative percentages for Pareto, into out if given
+function calculateCumulativePercentages(values, out = []) {
+    const total = values.reduce((sum, val) => sum + val, 0);
+    out.length = values.length;
+    let cumSum = 0;
+    for (let i = 0; i < values.length; i++) {
+        cumSum += values[i];
+        out[i] = total === 0 ? 0 : (cumSum / total) * 100;
+    }
+    return out;
+}
+
+// Bar colors of the cell and component charts (up to 15 bars each): one array
+// per chart, handed to Chart.js at init and rewritten in place to move the highlight
+const cellBarColors = new Array(15).fill('#0071CE');
+const componentBarColors = new Array(15).fill('#0071CE');
+function highlightBar(chart, label) {
+    const colors = chart.data.datasets[0].backgroundColor;
+    colors.fill('#0071CE');
+    const idx = label === null ? -1 : chart.data.labels.indexOf(label);
+    if (idx >= 0) colors[idx] = '#FFC220';
+}
+
+// Write ranked [id, value] entries into the chart's existing label and first
+// dataset arrays - Chart.js keeps its dataset state for arrays it already holds
+function setBars(chart, entries, labelList) {
+    const chartLabels = chart.data.labels;
+    const values = chart.data.datasets[0].data;
+    chartLabels.length = values.length = entries.length;
+    for (let i = 0; i < entries.length; i++) {
+        chartLabels[i] = labelList[entries[i][0]];
+        values[i] = entries[i][1];
+    }
+}
+
+// Totals indexed by label id (Int32Array counts unless SumArray says otherwise,
+// e.g. Float64Array for downtime), plus the ids in the order they were first
+// added to, so ranking breaks ties by first appearance in the rows
+function tally(size, SumArray = Int32Array) {
+    return { sum: new SumArray(size), seen: new Uint8Array(size), order: [] };
+}
+function addTo(t, id, value) {
+    if (!t.seen[id]) {
+        t.seen[id] = 1;
+        t.order.push(id);
+    }
+    t.sum[id] += value;
+}
+
+// [id, total] pairs of t, largest total first, at most k of them. Same result
+// as a stable sort of all entries + slice(0, k), but through a k-entry min-heap:
+// O(M log k) for M ids instead of O(M log M)
+function ranked(t, k) {
+    // Entries are [id, total, first-seen position]; heap[0] is the weakest kept
+    const weaker = (a, b) => a[1] < b[1] || (a[1] === b[1] && a[2] > b[2]);
+    const heap = [];
+    const swap = (i, j) => { const tmp = heap[i]; heap[i] = heap[j]; heap[j] = tmp; };
+    for (let pos = 0; pos < t.order.length; pos++) {
+        const entry = [t.order[pos], t.sum[t.order[pos]], pos];
+        if (heap.length < k) {
+            // Sift up
+            let i = heap.push(entry) - 1;
+            while (i > 0 && weaker(heap[i], heap[(i - 1) >> 1])) {
+                swap(i, (i - 1) >> 1);
+                i = (i - 1) >> 1;
+            }
+        } else if (k > 0 && weaker(heap[0], entry)) {
+            // Replace the root and sift down
+            heap[0] = entry;
+            let i = 0;
+            for (;;) {
+                const left = 2 * i + 1, right = left + 1;
+                let weakest = i;
+                if (left < k && weaker(heap[left], heap[weakest])) weakest = left;
+                if (right < k && weaker(heap[right], heap[weakest])) weakest = right;
+                if (weakest === i) break;
+                swap(i, weakest);
+                i = weakest;
+            }
+        }
+    }
+    return heap.sort((a, b) => weaker(a, b) ? 1 : -1).map(([id, total]) => [id, total]);
+}
+
+// Everything the page shows for a set of rows, in one pass: headline metrics,
+// per-cell stats (cell chart + table) and the component/alarm counts for the
+// drill-down, which only include the selected cell and component
+function computeAll(rows) {
+    let totalIncidents = 0, totalDowntime = 0, blockingCount = 0, starvingCount = 0;
+    const cellCount = tally(labels.cell.length);
+    const cellDowntime = new Float64Array(labels.cell.length);
+    const cellBlocking = new Int32Array(labels.cell.length);
+    const cellStarving = new Int32Array(labels.cell.length);
+    const compCounts = tally(labels.component.length);
+    const alarmCounts = tally(alarmShortTexts.labels.length);
+    const drillCell = selectedCell === null ? -1 : cellIds.get(selectedCell);
+    const drillComponent = selectedComponent === null ? -1 : componentIds.get(selectedComponent);
+    for (let r = 0; r < rows.length; r++) {
+        const i = rows[r];
+        const n = alarmCount[i];
+        const c = cellId[i];
+        totalIncidents += n;
+        totalDowntime += durationMins[i];
+        if (blocking[i]) blockingCount += n;
+        if (starving[i]) starvingCount += n;
+
+        addTo(cellCount, c, n);
+        cellDowntime[c] += durationMins[i];
+        if (blocking[i]) cellBlocking[c] += n;
+        if (starving[i]) cellStarving[c] += n;
+
+        if (drillCell >= 0 && c !== drillCell) continue;
+        addTo(compCounts, componentId[i], n);
+        if (drillComponent >= 0 && componentId[i] !== drillComponent) continue;
+        addTo(alarmCounts, alarmShortId[i], n);
+    }
+    return { totalIncidents, totalDowntime, blockingCount, starvingCount,
+             cellStats: { count: cellCount, downtime: cellDowntime, blocking: cellBlocking, starving: cellStarving },
+             compCounts, alarmCounts };
+}
+
+// Rows the drill-down charts count: the filtered rows, only those of the
+// selected cell if there is one. The per-cell split is kept until the filters
+// change, so further cell/component clicks only visit that cell's rows
+function drillRows() {
+    const rows = lastFilteredRows || allRows;
+    if (selectedCell === null) return rows;
+    if (!cellDrillRows) {
+        const buckets = Array.from({ length: labels.cell.length }, () => []);
+        for (const i of rows) {
+            if (cellId[i] >= 0) buckets[cellId[i]].push(i);
+        }
+        cellDrillRows = buckets.map(bucket => Int32Array.from(bucket));
+    }
+    return cellDrillRows[cellIds.get(selectedCell)] || [];
+}
+
+// computeAll's component/alarm counts for drillRows()
+function drillCounts(rows) {
+    const compCounts = tally(labels.component.length);
+    const alarmCounts = tally(alarmShortTexts.labels.length);
+    const drillComponent = selectedComponent === null ? -1 : componentIds.get(selectedComponent);
+    for (let r = 0; r < rows.length; r++) {
+        const i = rows[r];
+        addTo(compCounts, componentId[i], alarmCount[i]);
+        if (drillComponent >= 0 && componentId[i] !== drillComponent) continue;
+        addTo(alarmCounts, alarmShortId[i], alarmCount[i]);
+    }
+    return { compCounts, alarmCounts };
+}
+
+// Redraw the component and alarm charts for the current filters and selection
+function refreshDrillCharts() {
+    const counts = drillCounts(drillRows());
+    updateComponentChart(counts.compCounts);
+    updateAlarmChart(counts.alarmCounts);
+}
+
+// Handle cell bar click — drill down into components + alarm types
+function onCellBarClick(event, elements) {
+    if (!elements || elements.length === 0) return;
+    const idx = elements[0].index;
+    const clickedCell = cellChart.data.labels[idx];
+
+    // Toggle: if same cell clicked again, clear selection
+    if (selectedCell === clickedCell) {
+        clearCellSelection();
+        return;
+    }
+
+    selectedCell = clickedCell;
+    // Clear component selection when switching cells
+    resetComponentSelection();
+
+    // Highlight selected bar
+    highlightBar(cellChart, selectedCell);
+    cellChart.update('none');
+
+    // Update components + alarms charts for selected cell
+    refreshDrillCharts();
+
+    // Show badge
+    document.getElementById('cellFilterBadge').style.display = 'inline-flex';
+    document.getElementById('cellFilterLabel').textContent = selectedCell;
+    document.getElementById('compChartCellLabel').textContent = '\u2014 ' + selectedCell;
+    document.getElementById('alarmChartCellLabel').textContent = '\u2014 ' + selectedCell;
+}
+
+function clearCellSelection() {
+    selectedCell = null;
+
+    // Reset bar colors
+    if (cellChart) {
+        highlightBar(cellChart, null);
+        cellChart.update('none');
+    }
+
+    // Also clear component selection when cell changes
+    resetComponentSelection();
+
+    // Reset components + alarms to full data
+    refreshDrillCharts();
+
+    // Hide badge
+    document.getElementById('cellFilterBadge').style.display = 'none';
+    document.getElementById('compChartCellLabel').textContent = '';
+    document.getElementById('alarmChartCellLabel').textContent = '';
+}
+
+function updateComponentChart(compCounts) {
+    if (componentChart) {
+        setBars(componentChart, ranked(compCounts, 15), labels.component);
+        calculateCumulativePercentages(componentChart.data.datasets[0].data, componentChart.data.datasets[1].data);
+        // Preserve component highlight if selected
+        highlightBar(componentChart, selectedComponent);
+        componentChart.update('none');
+    }
+}
+
+function updateAlarmChart(alarmCounts) {
+    if (alarmChart) {
+        setBars(alarmChart, ranked(alarmCounts, 10), alarmShortTexts.labels);
+        alarmChart.update('none');
+    }
+}
+
+// Handle component bar click — drill down into alarm types
+function onComponentBarClick(event, elements) {
+    if (!elements || elements.length === 0) return;
+    // Only respond to clicks on the bar dataset (index 0), not the cumulative % line (index 1)
+    if (elements[0].datasetIndex !== 0) return;
+
+    const idx = elements[0].index;
+    const clickedComp = componentChart.data.labels[idx];
+
+    // Toggle: if same component clicked again, clear selection
+    if (selectedComponent === clickedComp) {
+        clearComponentSelection();
+        return;
+    }
+
+    selectedComponent = clickedComp;
+
+    // Highlight selected bar on component chart
+    highlightBar(componentChart, selectedComponent);
+    componentChart.update('none');
+
+    // Alarms for the current filters + cell selection + this component
+    updateAlarmChart(drillCounts(drillRows()).alarmCounts);
+
+    // Show badge + labels
+    document.getElementById('compFilterBadge').style.display = 'inline-flex';
+    document.getElementById('compFilterLabel').textContent = selectedComponent;
+    document.getElementById('alarmChartCompLabel').textContent = '\u2014 ' + selectedComponent;
+}
+
+// Drop the component selection without recomputing the charts
+function resetComponentSelection() {
+    selectedComponent = null;
+
+    // Reset component bar colors
+    if (componentChart) {
+        highlightBar(componentChart, null);
+        componentChart.update('none');
+    }
+
+    // Hide badge + labels
+    document.getElementById('compFilterBadge').style.display = 'none';
+    document.getElementById('alarmChartCompLabel').textContent = '';
+}
+
+function clearComponentSelection() {
+    resetComponentSelection();
+
+    // Refresh alarms with full data (respecting cell selection)
+    updateAlarmChart(drillCounts(drillRows()).alarmCounts);
+}
+
+// Get previous Walmart week
+function getPreviousWeek(weekStr) {
+    if (!weekStr || weekStr === 'ALL') return null;
+    const weekNum = parseInt(weekStr.replace('W', ''));
+    if (weekNum <= 1) return 'W52';
+    return 'W' + String(weekNum - 1).padStart(2, '0');
+}
+
+// Rows passing the filters (ascending), with their computeAll summary
+function filterRows(selectedWeek, selectedSites, selectedCells, alarmType, startDate, endDate) {
+    // Filter values as label ids; -2 (matches no row) for a value not in the data
+    const toCode = (ids, label) => ids.has(label) ? ids.get(label) : -2;
+    const weekCode = selectedWeek === 'ALL' ? null : toCode(weekIds, selectedWeek);
+    const siteCodes = selectedSites.includes('ALL') ? null : selectedSites.map(site => toCode(siteIds, site));
+    const cellCodes = selectedCells.includes('ALL') ? null : selectedCells.map(cell => toCode(cellIds, cell));
+    const startKey = dateKey(startDate);
+    const endKey = dateKey(endDate);
+
+    // Selected sites/cells as a flag per label id
+    const toMask = (codes, size) => {
+        if (!codes) return null;
+        const mask = new Uint8Array(size);
+        for (const code of codes) if (code >= 0) mask[code] = 1;
+        return mask;
+    };
+    const siteMask = toMask(siteCodes, labels.site.length);
+    const cellMask = toMask(cellCodes, labels.cell.length);
+    const flag = alarmType === 'BLOCKING' ? blocking : alarmType === 'STARVING' ? starving : null;
+
+    // Cheapest checks first: one flag byte, then id compares, then the date
+    const matches = i => {
+        if (flag && !flag[i]) return false;
+        if (weekCode !== null && weekId[i] !== weekCode) return false;
+        if (siteMask && !siteMask[siteId[i]]) return false;
+        if (cellMask && !cellMask[cellId[i]]) return false;
+        const date = dateInt[i];
+        return date === 0 || (date >= startKey && (!endKey || date <= endKey));
+    };
+    const candidates = candidateRows(weekCode, siteCodes, cellCodes, startKey, endKey);
+    let filtered;
+    if (candidates || alarmType !== 'ALL') {
+        filtered = [];
+        for (const i of candidates || allRows) {
+            if (matches(i)) filtered.push(i);
+        }
+    } else {
+        filtered = allRows;
+    }
+
+    return { rows: filtered, summary: computeAll(filtered) };
+}
+
+// Run fn once the browser is idle (at most 200ms later), replacing any render
+// still pending from an earlier call so a stale one never lands last
+let pendingRender = null;
+function whenIdle(fn) {
+    cancelPendingRender();
+    if (window.requestIdleCallback) {
+        const handle = requestIdleCallback(() => { pendingRender = null; fn(); }, { timeout: 200 });
+        pendingRender = () => cancelIdleCallback(handle);
+    } else {
+        const handle = setTimeout(() => { pendingRender = null; fn(); }, 0);
+        pendingRender = () => clearTimeout(handle);
+    }
+}
+function cancelPendingRender() {
+    if (pendingRender) pendingRender();
+    pendingRender = null;
+}
+
+// Apply filters
+function applyFilters() {
+    const selectedWeek = document.getElementById('wmWeekFilter').value;
+    const siteSelect = document.getElementById('siteFilter');
+    const selectedSites = Array.from(siteSelect.selectedOptions).map(opt => opt.value);
+    const cellSelect = document.getElementById('cellFilter');
+    const selectedCells = Array.from(cellSelect.selectedOptions).map(opt => opt.value);
+    const alarmType = document.getElementById('alarmTypeFilter').value;
+    const startDate = document.getElementById('startDate').value;
+    const endDate = document.getElementById('endDate').value;
+
+    // Drill-down counts in the summary depend on the selected cell/component too
+    const cacheKey = [selectedWeek, selectedSites.slice().sort().join(','), selectedCells.slice().sort().join(','),
+                      alarmType, startDate, endDate, selectedCell, selectedComponent].join('|');
+    let cached = filterCache.get(cacheKey);
+    if (cached) {
+        filterCache.delete(cacheKey);
+    } else {
+        cached = filterRows(selectedWeek, selectedSites, selectedCells, alarmType, startDate, endDate);
+        if (filterCache.size >= FILTER_CACHE_SIZE) filterCache.delete(filterCache.keys().next().value);
+    }
+    filterCache.set(cacheKey, cached);
+    const { rows: filtered, summary } = cached;
+
+    // Update metrics - each row counts alarmCount[i] alarms
+    const { totalIncidents, totalDowntime, blockingCount, starvingCount } = summary;
+    const avgDowntime = totalIncidents > 0 ? totalDowntime / totalIncidents : 0;
+
+    document.getElementById('metricTotal').textContent = totalIncidents.toLocaleString();
+    document.getElementById('metricDowntime').textContent = (totalDowntime / 60).toFixed(1);
+    document.getElementById('metricBlocking').textContent = blockingCount.toLocaleString();
+    document.getElementById('metricStarving').textContent = starvingCount.toLocaleString();
+    document.getElementById('metricAvg').textContent = avgDowntime.toFixed(2);
+
+    // Show status
+    const status = document.getElementById('filterStatus');
+    status.style.display = 'block';
+    status.textContent = `Showing ${totalIncidents.toLocaleString()} alarms | ${(totalDowntime/60).toFixed(1)} hours downtime | ${blockingCount.toLocaleString()} blocking | ${starvingCount.toLocaleString()} starving`;
+
+    // Charts, table and insights are the slow part - let the metrics paint first
+    whenIdle(() => {
+        updateCharts(filtered, summary);
+        updateTable(summary.cellStats);
+
+        // Update insights if week selected
+        if (selectedWeek !== 'ALL') {
+            const weekOnly = selectedSites.includes('ALL') && selectedCells.includes('ALL') && alarmType === 'ALL' &&
+                             [dashboardMeta.minDate, ''].includes(startDate) && [dashboardMeta.maxDate, ''].includes(endDate);
+            showWeeklyInsights(filtered, selectedWeek, selectedSites, weekOnly);
+        } else {
+            hideWeeklyInsights();
+        }
+    });
+}
+
+// Reset filters
+function resetFilters() {
+    document.getElementById('wmWeekFilter').value = 'ALL';
+    document.getElementById('alarmTypeFilter').value = 'ALL';
+    document.getElementById('startDate').value = dashboardMeta.minDate;
+    document.getElementById('endDate').value = dashboardMeta.maxDate;
+    Array.from(document.getElementById('siteFilter').options).forEach(opt => opt.selected = opt.value === 'ALL');
+    Array.from(document.getElementById('cellFilter').options).forEach(opt => opt.selected = opt.value === 'ALL');
+    clearCellSelection();
+    cancelPendingRender();
+
+    document.getElementById('metricTotal').textContent = dashboardMeta.metrics.total;
+    document.getElementById('metricDowntime').textContent = dashboardMeta.metrics.downtime;
+    document.getElementById('metricBlocking').textContent = dashboardMeta.metrics.blocking;
+    document.getElementById('metricStarving').textContent = dashboardMeta.metrics.starving;
+    document.getElementById('metricAvg').textContent = dashboardMeta.metrics.avg;
+
+    hideWeeklyInsights();
+    document.getElementById('filterStatus').style.display = 'none';
+
+    const summary = computeAll(allRows);
+    updateCharts(allRows, summary);
+    updateTable(summary.cellStats);
+}
+
+// Update charts - summary is computeAll(rows)
+function updateCharts(rows, summary) {
+    lastFilteredRows = rows;
+    cellDrillRows = null;
+
+    // Cell chart
+    if (cellChart) {
+        setBars(cellChart, ranked(summary.cellStats.count, 15), labels.cell);
+        // Preserve highlight if a cell is selected
+        highlightBar(cellChart, selectedCell);
+        cellChart.update('none');
+    }
+
+    // Component/alarm counts are already limited to the selected cell, if any
+    updateComponentChart(summary.compCounts);
+    updateAlarmChart(summary.alarmCounts);
+}
+
+// Table rows are created once (createTableRows) and rewritten in place
+const TABLE_SIZE = 20;
+const tableRows = [];
+function createTableRows() {
+    const fragment = document.createDocumentFragment();
+    for (let i = 0; i < TABLE_SIZE; i++) {
+        const tr = document.createElement('tr');
+        const cells = [];
+        for (let j = 0; j < 7; j++) cells.push(tr.appendChild(document.createElement('td')));
+        // Rank in bold; blocking/starving counts in their alarm colors
+        cells[0] = cells[0].appendChild(document.createElement('strong'));
+        cells[4].style.color = '#ea1100';
+        cells[5].style.color = '#996b00';
+        fragment.appendChild(tr);
+        tableRows.push({ tr, cells });
+    }
+    document.getElementById('cellTableBody').appendChild(fragment);
+}
+
+// Update table from computeAll's per-cell stats
+function updateTable(cellStats) {
+    const sorted = ranked(cellStats.count, TABLE_SIZE);
+
+    tableRows.forEach(({ tr, cells }, idx) => {
+        if (idx >= sorted.length) {
+            tr.style.display = 'none';
+            return;
+        }
+        const [id, count] = sorted[idx];
+        const downtime = cellStats.downtime[id];
+        cells[0].textContent = idx + 1;
+        cells[1].textContent = labels.cell[id];
+        cells[2].textContent = count.toLocaleString();
+        cells[3].textContent = downtime.toFixed(1);
+        cells[4].textContent = cellStats.blocking[id].toLocaleString();
+        cells[5].textContent = cellStats.starving[id].toLocaleString();
+        cells[6].textContent = count > 0 ? (downtime / count).toFixed(2) : '0.00';
+        tr.style.display = '';
+    });
+}
+
+// Weekly insights for rows, in the shape of the precomputed weeklySummaries
+// entries: [alarm id, downtime, occurrences] / [alarm id, count] lists
+function weeklyInsights(rows) {
+    // Loss, blocking and starving alarms and per-cell downtime, in one pass
+    const alarmDowntime = tally(alarmTexts.labels.length, Float64Array);
+    const alarmOccurrences = new Int32Array(alarmTexts.labels.length);
+    const blockingAlarms = tally(alarmTexts.labels.length);
+    const starvingAlarms = tally(alarmTexts.labels.length);
+    const cellDowntime = tally(labels.cell.length, Float64Array);
+    const cellOccurrences = new Int32Array(labels.cell.length);
+    let blockingTotal = 0, starvingTotal = 0;
+    for (let r = 0; r < rows.length; r++) {
+        const i = rows[r];
+        const alarm = alarmId[i], n = alarmCount[i];
+        addTo(alarmDowntime, alarm, durationMins[i]);
+        alarmOccurrences[alarm] += n;
+        if (blocking[i]) {
+            addTo(blockingAlarms, alarm, n);
+            blockingTotal += n;
+        }
+        if (starving[i]) {
+            addTo(starvingAlarms, alarm, n);
+            starvingTotal += n;
+        }
+        addTo(cellDowntime, cellId[i], durationMins[i]);
+        cellOccurrences[cellId[i]] += n;
+    }
+    const topLoss = ranked(alarmDowntime, 3).map(([alarm, downtime]) => [alarm, downtime, alarmOccurrences[alarm]]);
+
+    // Most impacted cell, and its top alarms from a second pass once it is known
+    const sortedCells = ranked(cellDowntime, 1);
+    let topCell, topCellAlarms = [];
+    if (sortedCells.length > 0) {
+        const [cell, downtime] = sortedCells[0];
+        topCell = [cell, downtime, cellOccurrences[cell]];
+        const cellAlarms = tally(alarmTexts.labels.length);
+        for (const i of rows) {
+            if (cellId[i] === cell) addTo(cellAlarms, alarmId[i], alarmCount[i]);
+        }
+        topCellAlarms = ranked(cellAlarms, 3);
+    }
+
+    return { topLoss, topBlocking: ranked(blockingAlarms, 3), blockingTotal,
+             topStarving: ranked(starvingAlarms, 3), starvingTotal, topCell, topCellAlarms };
+}
+
+// Insights are only rebuilt for a new rows array - filterRows returns the same
+// (cached) array for the same filter combination - and each block's markup is
+// only written to the DOM when it changed
+let lastInsightsRows = null;
+const insightsHtml = new Map();
+function setInsightsHtml(id, markup) {
+    if (insightsHtml.get(id) === markup) return;
+    insightsHtml.set(id, markup);
+    document.getElementById(id).innerHTML = markup;
+}
+
+// The insights section is only filled in while it is on screen: showing it
+// records what to render, and the render runs right away if the section is
+// visible or once it scrolls into view. Hiding it drops the pending render
+const insightsSection = document.getElementById('weeklyInsightsSection');
+let pendingInsights = null;
+let insightsVisible = !window.IntersectionObserver;
+if (window.IntersectionObserver) {
+    new IntersectionObserver(entries => {
+        insightsVisible = entries[entries.length - 1].isIntersecting;
+        renderPendingInsights();
+    }).observe(insightsSection);
+}
+
+function showWeeklyInsights(rows, selectedWeek, selectedSites, weekOnly) {
+    insightsSection.style.display = 'block';
+    pendingInsights = [rows, selectedWeek, selectedSites, weekOnly];
+    renderPendingInsights();
+}
+
+function hideWeeklyInsights() {
+    insightsSection.style.display = 'none';
+    pendingInsights = null;
+}
+
+function renderPendingInsights() {
+    if (!insightsVisible || !pendingInsights) return;
+    const args = pendingInsights;
+    pendingInsights = null;
+    updateWeeklyInsights(...args);
+}
+
+// weekOnly: no filter besides the week, so the precomputed summary applies
+function updateWeeklyInsights(rows, selectedWeek, selectedSites, weekOnly) {
+    if (rows === lastInsightsRows) return;
+    lastInsightsRows = rows;
+
+    document.getElementById('insightsWeekLabel').textContent = selectedWeek;
+    document.getElementById('insightsSiteLabel').textContent = selectedSites.includes('ALL') ? 'All Sites' : selectedSites.join(', ');
+
+    const insights = (weekOnly && weeklySummaries[selectedWeek]) || weeklyInsights(rows);
+    const { topLoss, topBlocking, blockingTotal, topStarving, starvingTotal, topCell, topCellAlarms } = insights;
+
+    setInsightsHtml('topLossAlarms', topLoss.map((item, idx) => {
+        const [alarm, downtime, occurrences] = item;
+        return `<div class="alarm-item"><strong>#${idx+1}</strong> ${alarmTextShort[alarm]}<br><small>${downtime.toFixed(0)} mins | ${occurrences} occurrences</small></div>`;
+    }).join(''));
+
+    setInsightsHtml('topBlockingAlarms', topBlocking.map((item, idx) => {
+        const [alarm, count] = item;
+        return `<div class="alarm-item blocking"><strong>#${idx+1}</strong> ${alarmTextShort[alarm]}<br><small>${count} blocking alarms</small></div>`;
+    }).join('') || '<p style="color: #888;">No blocking alarms</p>');
+
+    setInsightsHtml('topStarvingAlarms', topStarving.map((item, idx) => {
+        const [alarm, count] = item;
+        return `<div class="alarm-item starving"><strong>#${idx+1}</strong> ${alarmTextShort[alarm]}<br><small>${count} starving alarms</small></div>`;
+    }).join('') || '<p style="color: #888;">No starving alarms</p>');
+
+    if (topCell) {
+        const [cell, downtime] = topCell;
+        document.getElementById('mostImpactedCell').textContent = `${labels.cell[cell]} (${downtime.toFixed(0)} mins)`;
+        setInsightsHtml('mostImpactedCellAlarms', topCellAlarms.map((item, idx) => {
+            const [id, count] = item;
+            const alarm = alarmTexts.labels[id];
+            const display = alarm.length > 45 ? alarm.substring(0, 45) + '...' : alarm;
+            return `<div class="alarm-item"><strong>#${idx+1}</strong> ${display} <small>(${count}x)</small></div>`;
+        }).join(''));
+    }
+
+    // Recommendations
+    const recommendations = [];
+    if (topLoss.length > 0) {
+        const [id, downtime] = topLoss[0];
+        const alarm = alarmTexts.labels[id];
+        const short = alarm.length > 35 ? alarm.substring(0, 35) + '...' : alarm;
+        recommendations.push(`<div class="recommendation high">🚨 <strong>Fix:</strong> "${short}" - ${downtime.toFixed(0)} mins lost</div>`);
+    }
+    if (topCell) {
+        const [cell, , occurrences] = topCell;
+        recommendations.push(`<div class="recommendation high">🏭 <strong>Focus:</strong> ${labels.cell[cell]} needs attention (${occurrences} alarms)</div>`);
+    }
+    if (topBlocking.length > 0) {
+        recommendations.push(`<div class="recommendation medium">⛔ <strong>Blocking:</strong> ${blockingTotal} blocking alarms impacting flow</div>`);
+    }
+    if (topStarving.length > 0) {
+        recommendations.push(`<div class="recommendation medium">📉 <strong>Starving:</strong> ${starvingTotal} starving alarms - check upstream</div>`);
+    }
+    setInsightsHtml('weeklyRecommendations', recommendations.join(''));
+}
+
+// Initialize charts
+function initCharts() {
+    const summary = computeAll(allRows);
+
+    // Cell chart
+    const sortedCells = ranked(summary.cellStats.count, 15).map(([id, count]) => [labels.cell[id], count]);
+
+    cellChart = new MiniBarChart(document.getElementById('cellChart'), {
+        labels: sortedCells.map(c => c[0]),
+        data: sortedCells.map(c => c[1]),
+        backgroundColor: cellBarColors,
+        borderColor: '#005299',
+        onClick: onCellBarClick
+    });
+
+    // Component chart (Pareto) - starts from the generator's unfiltered top 15
+    const initComponents = dashboardMeta.initComponents;
+
+    componentChart = new Chart(document.getElementById('componentChart'), {
+        type: 'bar',
+        data: {
+            labels: initComponents.labels,
+            datasets: [{
+                label: 'Incidents',
+                data: initComponents.counts,
+                backgroundColor: componentBarColors,
+                borderWidth: 1,
+                yAxisID: 'y'
+            }, {
+                label: 'Cumulative %',
+                data: initComponents.cumulativePcts,
+                type: 'line',
+                borderColor: '#FF6900',
+                borderWidth: 3,
+                pointRadius: 4,
+                fill: false,
+                yAxisID: 'y1'
+            }]
+        },
+        options: {
+            ...STATIC_CHART_OPTIONS,
+            responsive: true,
+            maintainAspectRatio: false,
+            scales: {
+                y: { beginAtZero: true, position: 'left' },
+                y1: { beginAtZero: true, position: 'right', max: 100, grid: { drawOnChartArea: false } }
+            },
+            onClick: onComponentBarClick,
+            onHover: (event, elements) => {
+                event.native.target.style.cursor = elements.length ? 'pointer' : 'default';
+            }
+        }
+    });
+
+    // Alarm chart
+    const sortedAlarms = ranked(summary.alarmCounts, 10).map(([id, count]) => [alarmShortTexts.labels[id], count]);
+
+    alarmChart = new MiniBarChart(document.getElementById('alarmChart'), {
+        labels: sortedAlarms.map(a => a[0]),
+        data: sortedAlarms.map(a => a[1]),
+        backgroundColor: '#FFC220',
+        horizontal: true
+    });
+
+    // Initialize table
+    createTableRows();
+    updateTable(summary.cellStats);
+}
+
+// Trailing debounce: a burst of calls runs fn once, ms after the last one
+function debounce(fn, ms) {
+    let timer;
+    return (...args) => {
+        clearTimeout(timer);
+        timer = setTimeout(() => fn(...args), ms);
+    };
+}
+
+// Event listeners - multi-select clicks and date typing come in bursts, so
+// they share one debounced recompute; the Apply button stays synchronous
+const applyFiltersDebounced = debounce(applyFilters, 120);
+['wmWeekFilter', 'alarmTypeFilter', 'siteFilter', 'cellFilter'].forEach(id =>
+    document.getElementById(id).addEventListener('change', applyFiltersDebounced)
+);
+['startDate', 'endDate'].forEach(id =>
+    document.getElementById(id).addEventListener('input', applyFiltersDebounced)
+);
+
+// Init
+initCharts();
+
+// Auto-reload at 5:05 AM daily to pick up fresh BigQuery data
+function scheduleAutoReload() {
+    const now = new Date();
+    const target = new Date();
+    target.setHours(5, 5, 0, 0);
+    if (target <= now) target.setDate(target.getDate() + 1);
+    const msUntilReload = target - now;
+    console.log('[AIB Dashboard] Auto-reload scheduled in ' + Math.round(msUntilReload / 60000) + ' minutes (5:05 AM)');
+    setTimeout(() => location.reload(), msUntilReload);
+}
+scheduleAutoReload();
@@ -2,124 +2,567 @@
 
 This script:
 1. Queries BigQuery for latest AIB alarm data
-2. Saves to CSV
+2. Streams it to Parquet via the BigQuery Storage Read API
+   (falls back to the bq CLI + gzipped CSV, converted to Parquet when pyarrow is available)
 3. Generates the AIB dashboard
 
-Scheduled to run via Windows Task Scheduler.
+Scheduled to run via Windows Task Scheduler - either once per tick, or with
+--daemon as a long-lived process that refreshes every REFRESH_INTERVAL_MINUTES
+(the scheduled task can keep starting it; extra copies exit on the PID file lock).
 """
 
+import atexit
+import gzip
+import hashlib
+import io
+import json
+import os
+import shutil
 import subprocess
 import sys
-from datetime import datetime
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+try:
+    from google.cloud import bigquery
+    from google.cloud import bigquery_storage
+    HAS_BQ_STORAGE = HAS_PYARROW
+except ImportError:
+    HAS_BQ_STORAGE = False
+
 LOG_FILE = Path(r"C:\Users\o0o01hq\OneDrive - Walmart Inc\Desktop\Codepuppy\aib_refresh_log.txt")
 DATA_DIR = Path(r"C:\Users\o0o01hq\Downloads\symbotic_aib_data")
-DATA_FILE = DATA_DIR / "aib_dashboard_data.csv"
+DATA_FILE = DATA_DIR / "aib_dashboard_data.csv.gz"
+PARQUET_FILE = DATA_DIR / "aib_dashboard_data.parquet"
+# Uncompressed Arrow IPC copy of PARQUET_FILE - the dashboard memory-maps it
+# instead of decoding Parquet
+ARROW_FILE = DATA_DIR / "aib_dashboard_data.arrow"
+# Written once the refresh finishes; the dashboard waits on it before reading the data files
+DATA_READY_FILE = DATA_DIR / "aib_dashboard_data.ready"
+# Written after each successful refresh: query cache key (SHA-256 of query text +
+# UTC hour), row count and data file name - a cheap freshness check
+DONE_FILE = DATA_DIR / "aib_dashboard_data.done"
+CACHE_TTL_MINUTES = 30
+MAX_BYTES_BILLED = 100 * 1024**3  # 100 GiB - fail fast on runaway scans
+# --daemon mode: one refresh cycle per interval, one daemon per machine
+REFRESH_INTERVAL_MINUTES = 60
+PID_FILE = DATA_DIR / "aib_refresh.pid"
 DASHBOARD_SCRIPT = Path(r"C:\Users\o0o01hq\OneDrive - Walmart Inc\Desktop\Codepuppy\refresh_aib_dashboard.py")
 
+# BigQuery query - 35 days to ensure 4+ complete Walmart weeks
+# Only the columns refresh_aib_dashboard.py reads are selected (it derives
+# minutes from ALARM_DURATION_SECONDS itself), alarm text cut to the 200
+# characters the page shows
+# TABLESAMPLE picks ~25% of storage blocks spanning the full date range
+# (no per-row hash); no ORDER BY - the dashboard aggregates client-side
+AIB_QUERY_TEMPLATE = '''
+SELECT
+    SITE,
+    EQUIPMENT_CELL as CELLNAME,
+    ALARM_COMPONENT as COMPONENT,
+    SUBSTR(ALARM_TEXT, 1, 200) as ALARMTEXT,
+    TIMESTAMP_START as ALARM_START,
+    ALARM_DURATION_SECONDS,
+    BLOCKING,
+    STARVING,
+    EQUIPMENT_DRIVEWAY
+FROM `wmt-edw-sandbox.SYMBOTIC_DATA.snowflake_alarms` TABLESAMPLE SYSTEM (25 PERCENT)
+WHERE EQUIPMENT_TYPE = 'AIB'
+  AND {window}
+LIMIT {limit}
+'''
+# Redundant BUSINESS_DATE bounds (one day of TZ slack) let BigQuery prune blocks
+# on the date column before evaluating the TIMESTAMP_START filter
+AIB_QUERY = AIB_QUERY_TEMPLATE.format(limit=1500000, window='''TIMESTAMP_START >= TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL 35 DAY)
+  AND BUSINESS_DATE >= FORMAT_DATE('%Y-%m-%d', DATE_SUB(CURRENT_DATE(), INTERVAL 36 DAY))''')
+
+# The same 35 days as QUERY_WINDOWS one-week queries run concurrently on the
+# Storage Read API path; window bounds are passed as query parameters
+QUERY_WINDOWS = 5
+AIB_WINDOW_QUERY = AIB_QUERY_TEMPLATE.format(limit=1500000 // QUERY_WINDOWS, window='''TIMESTAMP_START >= @window_start
+  AND TIMESTAMP_START < @window_end
+  AND BUSINESS_DATE >= FORMAT_DATE('%Y-%m-%d', DATE_SUB(DATE(@window_start), INTERVAL 1 DAY))''')
+
+# Cheap probe - scans only the last two days - for the newest alarm timestamp;
+# if it hasn't moved since the last refresh there's nothing new to fetch
+MAX_TS_QUERY = '''
+SELECT MAX(TIMESTAMP_START) as MAX_TS
+FROM `wmt-edw-sandbox.SYMBOTIC_DATA.snowflake_alarms`
+WHERE EQUIPMENT_TYPE = 'AIB'
+  AND BUSINESS_DATE >= FORMAT_DATE('%Y-%m-%d', DATE_SUB(CURRENT_DATE(), INTERVAL 1 DAY))
+'''
+
+# Hash of the normalized query text (both forms), computed once - query_cache_key() adds the hour
+AIB_QUERY_HASH = hashlib.sha256(' '.join((AIB_QUERY + AIB_WINDOW_QUERY).split()).encode('utf-8'))
+
+# bq CLI fallback - the query text is appended per call
+BQ_CLI_ARGS = [
+    'bq', 'query',
+    '--use_legacy_sql=false',
+    '--format=csv',
+    '--max_rows=1500000',
+    f'--maximum_bytes_billed={MAX_BYTES_BILLED}',
+]
+
+# Optional bulk path for the CLI fallback: run the query into a temp table,
+# `bq extract` it to sharded CSV.gz in GCS and pull the shards down in
+# parallel with `gsutil -m cp`. Enabled when both are set, e.g.
+# AIB_EXTRACT_DATASET=my_project:tmp  AIB_EXTRACT_URI=gs://my-bucket/aib
+EXTRACT_DATASET = os.environ.get('AIB_EXTRACT_DATASET')
+EXTRACT_URI = os.environ.get('AIB_EXTRACT_URI', '').rstrip('/')
+EXTRACT_TABLE_EXPIRATION = 3600  # seconds - the temp table cleans itself up
+# Column order of AIB_QUERY_TEMPLATE, for the header of extracted CSVs
+AIB_COLUMNS = ['SITE', 'CELLNAME', 'COMPONENT', 'ALARMTEXT', 'ALARM_START', 'ALARM_DURATION_SECONDS',
+               'BLOCKING', 'STARVING', 'EQUIPMENT_DRIVEWAY']
+
+_bq_clients = None
+_log_fh = None
+_log_lock = threading.Lock()
+
 def log(message):
-    """Log message to file and console."""
+    """Log message to file and console.
+
+    The log file is opened once (line-buffered) and kept open for the run;
+    the refresh and dashboard threads log concurrently, hence the lock.
+    """
+    global _log_fh
     timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     log_msg = f"[{timestamp}] {message}"
-    print(log_msg)
-    with open(LOG_FILE, 'a', encoding='utf-8') as f:
-        f.write(log_msg + '\n')
+    with _log_lock:
+        print(log_msg)
+        if _log_fh is None:
+            _log_fh = open(LOG_FILE, 'a', encoding='utf-8', buffering=1)
+            atexit.register(_log_fh.close)
+        _log_fh.write(log_msg + '\n')
 
-def refresh_bigquery_data():
-    """Query BigQuery for fresh AIB data using bq CLI."""
-    log("Querying BigQuery for fresh AIB data (4 Walmart weeks)...")
+def bq_clients():
+    """Return (bigquery.Client, BigQueryReadClient), created once per process.
+
+    In --daemon mode this keeps the HTTP connection pool and cached
+    credentials across refresh cycles.
+    """
+    global _bq_clients
+    if _bq_clients is None:
+        _bq_clients = (bigquery.Client(), bigquery_storage.BigQueryReadClient())
+    return _bq_clients
+
+def latest_data_file():
+    """Return the most recently written data file (Parquet or CSV), or None."""
+    existing = [p for p in (PARQUET_FILE, DATA_FILE) if p.exists()]
+    if not existing:
+        return None
+    return max(existing, key=lambda p: p.stat().st_mtime)
+
+def run_streaming(cmd, timeout, stdout=subprocess.PIPE, copy_stdout_to=None, tail_lines=200, **popen_kwargs):
+    """Run cmd, draining its output pipes in background threads as it runs.
+
+    Only the last tail_lines of each stream are kept, so memory stays bounded
+    however much the child prints, and a full OS pipe buffer can't stall it.
+    Pass an open file as stdout to send it straight to disk, or a binary
+    file-like as copy_stdout_to to stream stdout through it (e.g. a gzip writer).
+    Returns (returncode, stdout_tail, stderr_tail); on timeout the child is
+    killed and subprocess.TimeoutExpired is raised.
+    """
+    proc = subprocess.Popen(cmd, stdout=stdout, stderr=subprocess.PIPE, **popen_kwargs)
+    stdout_tail, stderr_tail = deque(maxlen=tail_lines), deque(maxlen=tail_lines)
+    readers = [threading.Thread(target=stderr_tail.extend,
+                                args=(io.TextIOWrapper(proc.stderr, errors='replace'),), daemon=True)]
+    if proc.stdout is not None:
+        if copy_stdout_to is not None:
+            target, args = shutil.copyfileobj, (proc.stdout, copy_stdout_to, 1 << 20)
+        else:
+            target, args = stdout_tail.extend, (io.TextIOWrapper(proc.stdout, errors='replace'),)
+        readers.append(threading.Thread(target=target, args=args, daemon=True))
+    for reader in readers:
+        reader.start()
     
-    # Ensure data directory exists
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    try:
+        proc.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+        raise
+    finally:
+        for reader in readers:
+            reader.join()
+    return proc.returncode, list(stdout_tail), list(stderr_tail)
+
+class LineCountingWriter:
+    """Binary writer wrapper that counts newlines in everything written through it."""
+
+    def __init__(self, f):
+        self.f = f
+        self.lines = 0
+
+    def write(self, data):
+        self.lines += data.count(b'\n')  # C-level scan, no per-line objects
+        return self.f.write(data)
+
+def fsync_replace(f, tmp_file, target):
+    """Flush and fsync the open temp file, close it, then atomically move it over target."""
+    f.flush()
+    os.fsync(f.fileno())
+    f.close()
+    os.replace(tmp_file, target)
+
+class DataFileWriter:
+    """Write record batches to PARQUET_FILE and its ARROW_FILE sidecar in one pass.
+
+    Both go to sibling temp files that commit() swaps in, so readers never
+    see a partial file; close() discards whatever wasn't committed.
+    """
+
+    def __init__(self, schema):
+        self.targets = [PARQUET_FILE, ARROW_FILE]  # Parquet first - the sidecar is never older
+        self.tmp_files = [p.with_suffix(p.suffix + '.tmp') for p in self.targets]
+        self.files = [open(tmp_file, 'wb') for tmp_file in self.tmp_files]
+        self.writers = [pq.ParquetWriter(self.files[0], schema), pa.ipc.new_file(self.files[1], schema)]
+        self.closed = False
+
+    def write_batch(self, batch):
+        for writer in self.writers:
+            writer.write_batch(batch)
+
+    def commit(self):
+        self._close_writers()
+        for f, tmp_file, target in zip(self.files, self.tmp_files, self.targets):
+            fsync_replace(f, tmp_file, target)
+
+    def close(self):
+        self._close_writers()
+        for f, tmp_file in zip(self.files, self.tmp_files):
+            f.close()
+            tmp_file.unlink(missing_ok=True)
+
+    def _close_writers(self):
+        if not self.closed:
+            self.closed = True
+            for writer in self.writers:
+                writer.close()
+
+def query_cache_key():
+    """Cache key for the refresh query: normalized SQL text + current UTC hour."""
+    key = AIB_QUERY_HASH.copy()
+    key.update(datetime.now(timezone.utc).strftime('%Y%m%d%H').encode('utf-8'))
+    return key.hexdigest()
+
+def read_done_file():
+    """Return the last successful refresh record, or {} if there is no usable one.
+
+    The record only counts if it describes the current newest data file.
+    """
+    data_file = latest_data_file()
+    if data_file is None or not DONE_FILE.exists():
+        return {}
+    try:
+        done = json.loads(DONE_FILE.read_text(encoding='utf-8'))
+    except ValueError:
+        return {}
+    return done if done.get('file') == data_file.name else {}
+
+def is_cache_fresh(cache_key):
+    """True if the last refresh ran the same query this hour, within the TTL."""
+    if read_done_file().get('key') != cache_key:
+        return False
+    age_minutes = (datetime.now().timestamp() - latest_data_file().stat().st_mtime) / 60
+    return age_minutes < CACHE_TTL_MINUTES
+
+def probe_max_timestamp():
+    """Return the newest AIB alarm timestamp (as a string) via MAX_TS_QUERY, or None on failure."""
+    try:
+        if HAS_BQ_STORAGE:
+            job_config = bigquery.QueryJobConfig(maximum_bytes_billed=MAX_BYTES_BILLED)
+            rows = list(bq_clients()[0].query(MAX_TS_QUERY, job_config=job_config).result(timeout=120))
+            max_ts = rows[0]['MAX_TS'] if rows else None
+            return max_ts.isoformat() if max_ts is not None else None
+        returncode, stdout_tail, stderr_tail = run_streaming([*BQ_CLI_ARGS, MAX_TS_QUERY], timeout=120)
+        if returncode != 0 or len(stdout_tail) < 2:
+            log(f"Max timestamp probe failed: {''.join(stderr_tail).strip()}")
+            return None
+        return stdout_tail[1].strip() or None  # line 0 is the CSV header
+    except Exception as e:
+        log(f"Max timestamp probe error: {str(e)}")
+        return None
+
+def write_done_file(cache_key, row_count, max_ts):
+    """Record a successful refresh for is_cache_fresh() and the max timestamp probe."""
+    done = {'key': cache_key, 'rows': row_count, 'file': latest_data_file().name, 'max_ts': max_ts}
+    DONE_FILE.write_text(json.dumps(done), encoding='utf-8')
+
+def query_storage_api():
+    """Stream AIB data into PARQUET_FILE via the BigQuery Storage Read API.
+
+    The 35-day range runs as QUERY_WINDOWS one-week jobs in parallel, so
+    BigQuery works on them on separate slots and the downloads overlap.
+    Record batches are written to one Parquet file (plus the Arrow sidecar)
+    as they arrive, so peak memory is a few batches rather than the whole
+    result set.
+    Returns the number of rows written.
+    """
+    client, bqstorage_client = bq_clients()
+    now = datetime.now(timezone.utc)
+    windows = [(now - timedelta(days=7 * k), now - timedelta(days=7 * (k - 1)))
+               for k in range(1, QUERY_WINDOWS + 1)]
+    
+    write_lock = threading.Lock()
+    writer = None
+    row_count = 0
     
-    # BigQuery query - 35 days to ensure 4+ complete Walmart weeks
-    # Uses MOD sampling to get ~25% of rows spanning full date range
-    query = '''
-    SELECT
-        SITE,
-        EQUIPMENT_CELL as CELLNAME,
-        ALARM_COMPONENT as COMPONENT,
-        ALARM_TEXT as ALARMTEXT,
-        TIMESTAMP_START as ALARM_START,
-        TIMESTAMP_END as ALARM_END,
-        ALARM_DURATION_SECONDS,
-        ROUND(ALARM_DURATION_SECONDS/60, 2) as ALARM_DURATION_MINUTES,
-        DC,
-        BUSINESS_DATE,
-        EQUIPMENT_TYPE,
-        BLOCKING,
-        STARVING,
-        EQUIPMENT_DRIVEWAY
-    FROM `wmt-edw-sandbox.SYMBOTIC_DATA.snowflake_alarms`
-    WHERE EQUIPMENT_TYPE = 'AIB'
-      AND TIMESTAMP_START >= TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL 35 DAY)
-      AND MOD(ABS(FARM_FINGERPRINT(CAST(TIMESTAMP_START AS STRING))), 4) = 0
-    ORDER BY TIMESTAMP_START DESC
-    LIMIT 1500000
-    '''
-    
-    # Run bq query and export to CSV
-    # ~25% sampled data to capture 4+ Walmart weeks of AIB data
-    cmd = [
-        'bq', 'query',
-        '--use_legacy_sql=false',
-        '--format=csv',
-        '--max_rows=1500000',
-        query
+    def fetch_window(window_start, window_end):
+        nonlocal writer, row_count
+        job_config = bigquery.QueryJobConfig(
+            maximum_bytes_billed=MAX_BYTES_BILLED,
+            query_parameters=[
+                bigquery.ScalarQueryParameter('window_start', 'TIMESTAMP', window_start),
+                bigquery.ScalarQueryParameter('window_end', 'TIMESTAMP', window_end),
+            ]
+        )
+        rows = client.query(AIB_WINDOW_QUERY, job_config=job_config).result(timeout=600)  # 10 minute timeout per job
+        for batch in rows.to_arrow_iterable(bqstorage_client=bqstorage_client):
+            with write_lock:
+                if writer is None:
+                    writer = DataFileWriter(batch.schema)
+                writer.write_batch(batch)
+                row_count += batch.num_rows
+    
+    try:
+        with ThreadPoolExecutor(max_workers=QUERY_WINDOWS) as pool:
+            futures = [pool.submit(fetch_window, start, end) for start, end in windows]
+            for future in futures:
+                future.result()  # re-raises the first failed window
+        if writer is not None:
+            writer.commit()
+    finally:
+        if writer is not None:
+            writer.close()
+    return row_count
+
+def convert_csv_to_parquet():
+    """Stream-convert the bq CLI CSV.gz in DATA_FILE into PARQUET_FILE (and ARROW_FILE).
+
+    Column types are fixed up front (no inference), so the dashboard gets the
+    same typed Parquet file as the Storage Read API path.
+    """
+    column_types = {
+        'SITE': pa.string(),
+        'CELLNAME': pa.string(),
+        'COMPONENT': pa.string(),
+        'ALARMTEXT': pa.string(),
+        'ALARM_START': pa.string(),  # parsed by the dashboard
+        'ALARM_DURATION_SECONDS': pa.float64(),
+        'BLOCKING': pa.bool_(),
+        'STARVING': pa.bool_(),
+        'EQUIPMENT_DRIVEWAY': pa.string(),
+    }
+    reader = pa_csv.open_csv(DATA_FILE, convert_options=pa_csv.ConvertOptions(column_types=column_types))
+    writer = DataFileWriter(reader.schema)
+    try:
+        for batch in reader:
+            writer.write_batch(batch)
+        writer.commit()
+    finally:
+        writer.close()
+    DATA_FILE.unlink()
+
+def query_bq_extract(query):
+    """Run the query into a temp table and bulk-export it via GCS to DATA_FILE.
+
+    `bq extract` with a wildcard URI splits the table into several gzipped CSV
+    shards, which `gsutil -m cp` downloads in parallel. The shards are
+    exported without headers and concatenated after a one-line header
+    member - concatenated gzip members are a valid gzip file - so DATA_FILE
+    looks the same as query_bq_cli()'s output.
+    Returns the number of rows saved, or None if any step failed.
+    """
+    table = f"{EXTRACT_DATASET}.aib_cache_{int(time.time())}"
+    shard_uri = f"{EXTRACT_URI}/{table.replace(':', '.').replace('.', '_')}/aib-*.csv.gz"
+    steps = [
+        ('query', [*BQ_CLI_ARGS[:3], '--format=none', f'--maximum_bytes_billed={MAX_BYTES_BILLED}',
+                   f'--destination_table={table}', '--replace', query]),
+        ('expiration', ['bq', 'update', f'--expiration={EXTRACT_TABLE_EXPIRATION}', table]),
+        ('extract', ['bq', 'extract', '--destination_format=CSV', '--compression=GZIP',
+                     '--print_header=false', table, shard_uri]),
     ]
+    tmp_file = DATA_FILE.with_name(DATA_FILE.name + '.tmp')
+    
+    try:
+        log(f"Running BQ query into {table} for GCS extract...")
+        for name, cmd in steps:
+            returncode, _, stderr_tail = run_streaming(cmd, timeout=600)
+            if returncode != 0:
+                log(f"BQ {name} failed: {''.join(stderr_tail).strip()}")
+                return None
+        
+        returncode, stdout_tail, stderr_tail = run_streaming(['bq', 'show', '--format=json', table], timeout=120)
+        if returncode != 0:
+            log(f"BQ show failed: {''.join(stderr_tail).strip()}")
+            return None
+        row_count = int(json.loads(''.join(stdout_tail))['numRows'])
+        
+        with tempfile.TemporaryDirectory(dir=DATA_DIR) as shard_dir:
+            returncode, _, stderr_tail = run_streaming(['gsutil', '-m', 'cp', shard_uri, shard_dir], timeout=600)
+            if returncode != 0:
+                log(f"gsutil download failed: {''.join(stderr_tail).strip()}")
+                return None
+            with open(tmp_file, 'wb') as f:
+                with gzip.GzipFile(fileobj=f, mode='wb', compresslevel=1) as gz:
+                    gz.write((','.join(AIB_COLUMNS) + '\n').encode('utf-8'))
+                for shard in sorted(Path(shard_dir).glob('aib-*.csv.gz')):
+                    with open(shard, 'rb') as shard_f:
+                        shutil.copyfileobj(shard_f, f, 1 << 20)
+                fsync_replace(f, tmp_file, DATA_FILE)
+        run_streaming(['gsutil', '-m', 'rm', shard_uri], timeout=300)
+        log(f"BigQuery data saved: {row_count:,} rows")
+        
+        if HAS_PYARROW:
+            try:
+                convert_csv_to_parquet()
+                log(f"Converted CSV to Parquet: {PARQUET_FILE.name}")
+            except Exception as e:
+                log(f"Parquet conversion failed, keeping CSV: {str(e)}")
+        return row_count
+    
+    except subprocess.TimeoutExpired:
+        log("BQ extract timed out")
+        return None
+    except Exception as e:
+        log(f"BQ extract error: {str(e)}")
+        return None
+    finally:
+        tmp_file.unlink(missing_ok=True)
+
+def query_bq_cli(query):
+    """Run the query with the bq CLI, streaming gzipped CSV output to DATA_FILE.
+
+    Returns the number of rows saved, or None if the query failed.
+    """
+    cmd = [*BQ_CLI_ARGS, query]
+    # Stream into a sibling file and swap it in atomically, so a failed or
+    # concurrent run never sees a truncated CSV
+    tmp_file = DATA_FILE.with_name(DATA_FILE.name + '.tmp')
     
     try:
         log("Running BQ query...")
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=600  # 10 minute timeout
-        )
+        # bq's raw bytes are gzipped on the way to disk (no decode/re-encode);
+        # the repetitive alarm text compresses well even at level 1
+        with open(tmp_file, 'wb') as f:
+            with gzip.GzipFile(fileobj=f, mode='wb', compresslevel=1) as gz:
+                counter = LineCountingWriter(gz)
+                returncode, _, stderr_tail = run_streaming(cmd, timeout=600, copy_stdout_to=counter)  # 10 minute timeout
+            if returncode == 0:
+                fsync_replace(f, tmp_file, DATA_FILE)
         
-        if result.returncode == 0:
-            # Save to CSV
-            with open(DATA_FILE, 'w', encoding='utf-8') as f:
-                f.write(result.stdout)
-            
-            # Count rows
-            row_count = len(result.stdout.strip().split('\n')) - 1  # minus header
+        if returncode == 0:
+            # Rows were counted on the way through - no second pass over the file
+            row_count = max(counter.lines - 1, 0)  # minus header
             log(f"BigQuery data saved: {row_count:,} rows")
-            return True
+            
+            if HAS_PYARROW:
+                try:
+                    convert_csv_to_parquet()
+                    log(f"Converted CSV to Parquet: {PARQUET_FILE.name}")
+                except Exception as e:
+                    log(f"Parquet conversion failed, keeping CSV: {str(e)}")
+            return row_count
         else:
-            log(f"BQ query failed: {result.stderr}")
-            return False
+            log(f"BQ query failed: {''.join(stderr_tail).strip()}")
+            return None
             
     except subprocess.TimeoutExpired:
         log("BQ query timed out after 10 minutes")
-        return False
+        return None
     except Exception as e:
         log(f"BQ query error: {str(e)}")
+        return None
+    finally:
+        tmp_file.unlink(missing_ok=True)
+
+def refresh_bigquery_data():
+    """Query BigQuery for fresh AIB data.
+
+    Uses the Storage Read API (Arrow -> Parquet) when the client libraries are
+    installed, otherwise falls back to the bq CLI (CSV).
+    """
+    log("Querying BigQuery for fresh AIB data (4 Walmart weeks)...")
+    
+    # Ensure data directory exists
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    
+    cache_key = query_cache_key()
+    if is_cache_fresh(cache_key):
+        log(f"Cache hit - data refreshed within the last {CACHE_TTL_MINUTES} minutes, skipping BQ query")
+        return True
+    
+    max_ts = probe_max_timestamp()
+    if max_ts is not None and read_done_file().get('max_ts') == max_ts:
+        log(f"No new data since last refresh (latest alarm: {max_ts}), skipping BQ query")
+        return True
+    
+    if HAS_BQ_STORAGE:
+        try:
+            log("Running BQ query (Storage Read API)...")
+            row_count = query_storage_api()
+            if row_count == 0:
+                log("BQ query returned no rows")
+                return False
+            log(f"BigQuery data saved: {row_count:,} rows")
+            write_done_file(cache_key, row_count, max_ts)
+            return True
+        except Exception as e:
+            log(f"Storage Read API error: {str(e)} - falling back to bq CLI")
+    else:
+        log("google-cloud-bigquery-storage/pyarrow not installed - using bq CLI")
+    
+    row_count = None
+    if EXTRACT_DATASET and EXTRACT_URI:
+        row_count = query_bq_extract(AIB_QUERY)
+        if row_count is None:
+            log("GCS extract failed - falling back to bq query output")
+    if row_count is None:
+        row_count = query_bq_cli(AIB_QUERY)
+    if row_count is None:
         return False
+    write_done_file(cache_key, row_count, max_ts)
+    return True
 
 def generate_dashboard():
-    """Run the dashboard generation script."""
+    """Run the dashboard generation script.
+
+    Started alongside refresh_bigquery_data(): the script queries BigQuery
+    itself and only waits on DATA_READY_FILE if it has to fall back to the
+    local data file.
+    """
     log("Generating AIB dashboard...")
     
     try:
-        result = subprocess.run(
+        returncode, stdout_tail, stderr_tail = run_streaming(
             [sys.executable, str(DASHBOARD_SCRIPT)],
-            capture_output=True,
-            text=True,
-            timeout=300,  # 5 minute timeout
-            cwd=DASHBOARD_SCRIPT.parent
+            timeout=900,  # 15 minute timeout (may wait on the 10 minute BQ refresh)
+            cwd=DASHBOARD_SCRIPT.parent,
+            env={**os.environ, 'AIB_DATA_READY_FILE': str(DATA_READY_FILE)}
         )
         
-        if result.returncode == 0:
+        if returncode == 0:
             log("Dashboard generated successfully")
             # Log last few lines of output
-            output_lines = result.stdout.strip().split('\n')[-5:]
-            for line in output_lines:
-                log(f"  {line}")
+            for line in stdout_tail[-5:]:
+                log(f"  {line.rstrip()}")
             return True
         else:
-            log(f"Dashboard generation failed: {result.stderr}")
+            log(f"Dashboard generation failed: {''.join(stderr_tail).strip()}")
             return False
             
     except subprocess.TimeoutExpired:
@@ -129,26 +572,86 @@ def generate_dashboard():
         log(f"Dashboard generation error: {str(e)}")
         return False
 
-def main():
+def acquire_pid_lock():
+    """Take an exclusive lock on PID_FILE and write our PID into it.
+
+    Returns the open file - keep it referenced for the life of the process -
+    or None if another daemon holds the lock. The OS drops the lock when the
+    process exits, so a crash never leaves a stale PID file behind.
+    """
+    f = open(PID_FILE, 'a+')
+    try:
+        if os.name == 'nt':
+            import msvcrt
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        f.close()
+        return None
+    f.seek(0)
+    f.truncate()
+    f.write(str(os.getpid()))
+    f.flush()
+    return f
+
+def run_daemon():
+    """Run refresh_once() every REFRESH_INTERVAL_MINUTES until interrupted.
+
+    Imports, BigQuery clients and the log file are set up once instead of on
+    every scheduled run.
+    """
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    pid_lock = acquire_pid_lock()
+    if pid_lock is None:
+        log("Auto-refresh daemon already running - exiting")
+        return
+    
+    log(f"Auto-refresh daemon started (pid {os.getpid()}, every {REFRESH_INTERVAL_MINUTES} minutes)")
+    try:
+        while True:
+            started = time.monotonic()
+            try:
+                refresh_once()
+            except Exception as e:
+                log(f"Refresh cycle error: {str(e)}")
+            time.sleep(max(0, REFRESH_INTERVAL_MINUTES * 60 - (time.monotonic() - started)))
+    finally:
+        pid_lock.close()
+
+def refresh_once():
     """Main refresh workflow."""
     log("="*60)
     log("AIB DASHBOARD AUTO-REFRESH STARTED")
     log("="*60)
     
-    # Check if data file exists and is recent (within 6 hours)
-    # If BQ refresh fails, we can still use existing data
-    bq_success = refresh_bigquery_data()
-    
-    if not bq_success:
-        if DATA_FILE.exists():
-            file_age_hours = (datetime.now().timestamp() - DATA_FILE.stat().st_mtime) / 3600
-            log(f"Using existing data file (age: {file_age_hours:.1f} hours)")
-        else:
-            log("ERROR: No data file available. Cannot generate dashboard.")
-            return
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    DATA_READY_FILE.unlink(missing_ok=True)
     
-    # Generate dashboard
-    dash_success = generate_dashboard()
+    # Run the BQ refresh and dashboard generation concurrently - the dashboard
+    # warms up (imports, BigQuery connection, its own query) during the download
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        dash_future = pool.submit(generate_dashboard)
+        bq_future = pool.submit(refresh_bigquery_data)
+        
+        try:
+            # If BQ refresh fails, we can still use existing data
+            bq_success = bq_future.result()
+            
+            if not bq_success:
+                latest = latest_data_file()
+                if latest:
+                    file_age_hours = (datetime.now().timestamp() - latest.stat().st_mtime) / 3600
+                    log(f"Using existing data file (age: {file_age_hours:.1f} hours)")
+                else:
+                    log("WARNING: No data file available - dashboard depends on its own BigQuery query")
+        finally:
+            # Always release the dashboard, even if the refresh raised
+            DATA_READY_FILE.write_text(datetime.now().isoformat(), encoding='utf-8')
+        
+        dash_success = dash_future.result()
     
     if dash_success:
         log("AIB DASHBOARD REFRESH COMPLETE!")
@@ -157,5 +660,11 @@ def main():
     
     log("="*60 + "\n")
 
+def main():
+    if '--daemon' in sys.argv[1:]:
+        run_daemon()
+    else:
+        refresh_once()
+
 if __name__ == '__main__':
     main()
@@ -3,16 +3,68 @@
 Pulls AIB data directly from BigQuery and generates a dedicated AIB dashboard.
 """
 
+import base64
+import hashlib
+import html
+import os
+import time
+import numpy as np
 import pandas as pd
 import json
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from google.cloud import bigquery
+from google.api_core.exceptions import Forbidden, NotFound
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    import pyarrow.feather as feather
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
 
 DOWNLOADS = r"C:\Users\o0o01hq\Downloads"
-AIB_DATA_FILE = Path(DOWNLOADS) / "symbotic_aib_data" / "aib_dashboard_data.csv"
+AIB_DATA_FILE = Path(DOWNLOADS) / "symbotic_aib_data" / "aib_dashboard_data.csv.gz"
+AIB_PARQUET_FILE = AIB_DATA_FILE.with_name("aib_dashboard_data.parquet")
+AIB_ARROW_FILE = AIB_DATA_FILE.with_name("aib_dashboard_data.arrow")
 OUTPUT_FILE = r"C:\Users\o0o01hq\OneDrive - Walmart Inc\Desktop\Codepuppy\aib_dashboard.html"
+INCIDENTS_PARQUET_FILE = Path(OUTPUT_FILE).with_name("aib_incidents.parquet")  # page data, for ad-hoc analysis
+# Source table metadata (plus run date and generator code) from the run that
+# last built OUTPUT_FILE from BigQuery; a matching fingerprint skips the rebuild
+SOURCE_TABLE = "wmt-edw-sandbox.SYMBOTIC_DATA.snowflake_alarms"
+FINGERPRINT_FILE = Path(OUTPUT_FILE + ".fp")
+DASHBOARD_JS_FILE = Path(__file__).with_name("aib_dashboard.js")  # static page script, inlined as-is
 DAYS_BACK = 56  # ~8 weeks of data
+# Query results are written here and re-read while still fresh, so reruns within
+# the hour skip the query and page the stored table over the Storage API
+AIB_CACHE_TABLE = "wmt-edw-sandbox.SYMBOTIC_DATA.aib_dashboard_cache"
+AIB_CACHE_TTL_MINUTES = 60
+WM_FY_START = pd.Timestamp(2025, 2, 1)  # Walmart fiscal year start, week W01
+# Set by auto_refresh_aib.py, which refreshes the local data file while this script runs
+DATA_READY_FILE = os.environ.get('AIB_DATA_READY_FILE')
+DATA_READY_TIMEOUT = 720  # seconds - BQ refresh timeout plus slack
+# Columns and fixed types read from the auto-refresh CSV, so read_csv skips
+# the rest of the file and per-column type inference
+AIB_CSV_DTYPES = {
+    'SITE': str,
+    'CELLNAME': str,
+    'COMPONENT': str,
+    'ALARMTEXT': str,
+    'ALARM_START': str,  # parsed after load, same as the Parquet/Arrow text
+    'ALARM_DURATION_SECONDS': 'float64',
+    'ALARM_DURATION_MINUTES': 'float64',  # older files only
+    'BLOCKING': 'boolean',
+    'STARVING': 'boolean',
+}
+# The page only ever counts and sums alarms, so it is fed one row per
+# (site, cell, component, alarm text, day, blocking, starving) with an
+# INCIDENTS count and summed duration instead of one row per alarm
+INCIDENT_GRAIN = ['SITE', 'CELLNAME', 'COMPONENT', 'ALARMTEXT', 'ALARM_DATE', 'BLOCKING', 'STARVING']
 
 print("="*70)
 print("GENERATING AIB SYMBOTIC DASHBOARD FROM BIGQUERY")
@@ -28,160 +80,352 @@ except Exception as e:
     print("[INFO] Falling back to local CSV file...")
     USE_BIGQUERY = False
 
+# Nothing to do if the source table hasn't changed since the page was last built.
+# The query window moves with the (UTC) date and the page with this code, so both
+# are part of the fingerprint too
+data_fingerprint = None
+if USE_BIGQUERY:
+    try:
+        source_table = bq_client.get_table(SOURCE_TABLE)
+        code_hash = hashlib.sha256(Path(__file__).read_bytes() + DASHBOARD_JS_FILE.read_bytes()).hexdigest()[:16]
+        data_fingerprint = json.dumps({
+            'num_rows': source_table.num_rows,
+            'modified': source_table.modified.isoformat(),
+            'date': datetime.now(timezone.utc).date().isoformat(),
+            'code': code_hash,
+        })
+    except Exception as e:
+        print(f"[WARNING] Could not read {SOURCE_TABLE} metadata: {e}")
+    if (data_fingerprint and Path(OUTPUT_FILE).exists() and FINGERPRINT_FILE.exists()
+            and FINGERPRINT_FILE.read_text(encoding='utf-8') == data_fingerprint):
+        print(f"[OK] {SOURCE_TABLE} unchanged since the last build - dashboard is up to date")
+        exit(0)
+
+def cached_query_rows(query):
+    """Rows of query, read from AIB_CACHE_TABLE when it holds a fresh result of the same SQL."""
+    # Labelled on the table so a changed query (e.g. DAYS_BACK) never reads a stale result
+    query_hash = hashlib.sha256(query.encode('utf-8')).hexdigest()[:16]
+    try:
+        table = bq_client.get_table(AIB_CACHE_TABLE)
+    except NotFound:
+        table = None
+    if (table is not None and table.labels.get('query_hash') == query_hash
+            and datetime.now(timezone.utc) - table.modified < timedelta(minutes=AIB_CACHE_TTL_MINUTES)):
+        print(f"   [CACHE] Reading {AIB_CACHE_TABLE} (written {table.modified:%Y-%m-%d %H:%M} UTC)")
+        return bq_client.list_rows(table)
+
+    job_config = bigquery.QueryJobConfig(
+        destination=AIB_CACHE_TABLE,
+        write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
+        use_query_cache=True,
+    )
+    try:
+        rows = bq_client.query(query, job_config=job_config).result()
+    except Forbidden as e:
+        print(f"   [INFO] Cannot write {AIB_CACHE_TABLE} ({e}) - querying without the cache table")
+        return bq_client.query(query).result()
+    table = bq_client.get_table(AIB_CACHE_TABLE)
+    table.labels = {'query_hash': query_hash}
+    bq_client.update_table(table, ['labels'])
+    return rows
+
 df = None
 
 # Fetch AIB data from BigQuery
 if USE_BIGQUERY:
     print(f"\n[AIB] Querying BigQuery for AIB alarm data ({DAYS_BACK} days)...")
+    # Aggregated to INCIDENT_GRAIN in BigQuery - far fewer rows to download than raw alarms.
+    # No ORDER BY: the page sorts everything it shows, and an unsorted result skips
+    # the final single-worker sort stage and streams in parallel over the Storage API
     aib_query = f"""
     SELECT 
         DC as SITE,
         CONCAT('AIB', EQUIPMENT_CELL) as CELLNAME,
-        TIMESTAMP_START as ALARM_START,
-        TIMESTAMP_END as ALARM_END,
-        ALARM_TEXT as ALARMTEXT,
         ALARM_COMPONENT as COMPONENT,
-        ALARM_DURATION_SECONDS / 60.0 as Duration_mins,
-        ALARM_DURATION_SECONDS,
-        DC,
-        BUSINESS_DATE,
-        EQUIPMENT_TYPE,
-        BLOCKING as BLOCK,
-        'AIB' as _source
-    FROM `wmt-edw-sandbox.SYMBOTIC_DATA.snowflake_alarms`
+        SUBSTR(ALARM_TEXT, 1, 200) as ALARMTEXT,  -- all the page shows
+        DATE(TIMESTAMP_START) as ALARM_DATE,
+        IFNULL(BLOCKING, FALSE) as BLOCKING,
+        IFNULL(STARVING, FALSE) as STARVING,
+        COUNT(*) as INCIDENTS,
+        SUM(ALARM_DURATION_SECONDS) as ALARM_DURATION_SECONDS
+    FROM `{SOURCE_TABLE}`
     WHERE EQUIPMENT_TYPE = 'AIB'
     AND BUSINESS_DATE >= FORMAT_DATE('%Y-%m-%d', DATE_SUB(CURRENT_DATE(), INTERVAL {DAYS_BACK} DAY))
-    ORDER BY TIMESTAMP_START DESC
+    GROUP BY SITE, CELLNAME, COMPONENT, ALARMTEXT, ALARM_DATE, BLOCKING, STARVING
     LIMIT 1500000
     """
     try:
-        df = bq_client.query(aib_query).to_dataframe()
-        df['Duration_mins'] = pd.to_numeric(df['Duration_mins'], errors='coerce').fillna(0)
-        total_aib_downtime = df['Duration_mins'].sum()
-        print(f"   [OK] Retrieved {len(df):,} AIB records from BigQuery")
+        # Download over the BigQuery Storage Read API (Arrow batches over gRPC) rather
+        # than paged REST JSON; the client falls back to REST if the library is missing
+        df = cached_query_rows(aib_query).to_dataframe(
+            create_bqstorage_client=True,
+            dtypes={'INCIDENTS': 'int64', 'ALARM_DURATION_SECONDS': 'float64', 'BLOCKING': 'boolean', 'STARVING': 'boolean'}
+        )
+        df['ALARM_DATE'] = pd.to_datetime(df['ALARM_DATE'])
+        total_aib_downtime = pd.to_numeric(df['ALARM_DURATION_SECONDS'], errors='coerce').sum() / 60
+        print(f"   [OK] Retrieved {df['INCIDENTS'].sum():,} AIB records ({len(df):,} groups) from BigQuery")
         print(f"   AIB Total Downtime: {total_aib_downtime:,.1f} mins ({total_aib_downtime/60:,.1f} hours)")
         if len(df) > 0:
-            print(f"   AIB Date Range: {df['ALARM_START'].min()} to {df['ALARM_START'].max()}")
+            print(f"   AIB Date Range: {df['ALARM_DATE'].min()} to {df['ALARM_DATE'].max()}")
             print(f"   AIB Sites: {', '.join(str(s) for s in df['SITE'].dropna().unique()[:10])}...")
     except Exception as e:
         print(f"   [ERROR] AIB BigQuery query failed: {e}")
         df = None
 
-# Fallback to local CSV if BigQuery failed
+# Fallback to local data file if BigQuery failed
 if df is None or len(df) == 0:
-    if not AIB_DATA_FILE.exists():
-        print(f"\n[ERROR] AIB data file not found: {AIB_DATA_FILE}")
+    data_fingerprint = None  # the page won't reflect the table fingerprinted above
+    if DATA_READY_FILE and not Path(DATA_READY_FILE).exists():
+        print("[INFO] Waiting for auto-refresh to finish writing the data file...")
+        deadline = time.time() + DATA_READY_TIMEOUT
+        while not Path(DATA_READY_FILE).exists() and time.time() < deadline:
+            time.sleep(1)
+    
+    # auto_refresh_aib.py writes Parquet plus an Arrow IPC copy, or CSV.gz (bq CLI
+    # without pyarrow) - use the newest; the Arrow copy wins a tie with its Parquet
+    candidates = (AIB_ARROW_FILE, AIB_PARQUET_FILE, AIB_DATA_FILE) if HAS_PYARROW else (AIB_DATA_FILE,)
+    data_files = [p for p in candidates if p.exists()]
+    if not data_files:
+        print(f"\n[ERROR] AIB data file not found: {AIB_PARQUET_FILE} / {AIB_DATA_FILE.name}")
         print("Please ensure BigQuery connection works or export data first.")
         exit(1)
+    data_file = max(data_files, key=lambda p: p.stat().st_mtime)
     
-    file_size_mb = AIB_DATA_FILE.stat().st_size / (1024*1024)
-    print(f"\n[FALLBACK] Loading AIB data from CSV: {AIB_DATA_FILE.name} ({file_size_mb:.1f} MB)")
+    file_size_mb = data_file.stat().st_size / (1024*1024)
+    print(f"\n[FALLBACK] Loading AIB data from file: {data_file.name} ({file_size_mb:.1f} MB)")
     
-    if file_size_mb > 200:
-        print("Large file detected - loading up to 1,000,000 rows")
-        df = pd.read_csv(AIB_DATA_FILE, nrows=1000000)
+    if data_file.suffix == '.arrow':
+        # Memory-mapped, uncompressed IPC - no decode step before to_pandas()
+        df = feather.read_table(data_file, memory_map=True).to_pandas()
+    elif data_file.suffix == '.parquet':
+        df = pd.read_parquet(data_file)
     else:
-        df = pd.read_csv(AIB_DATA_FILE)
-    print(f"Loaded {len(df):,} AIB records from CSV")
+        # pd.read_csv decompresses the .gz transparently. Only the columns used
+        # below are parsed (older files carry a few more)
+        header = pd.read_csv(data_file, nrows=0).columns
+        csv_options = {
+            'usecols': [c for c in header if c in AIB_CSV_DTYPES],
+            'dtype': AIB_CSV_DTYPES,
+        }
+        if HAS_PYARROW:
+            # Multithreaded Arrow parser - fast enough to load the whole file
+            df = pd.read_csv(data_file, engine='pyarrow', **csv_options)
+        elif file_size_mb > 200:
+            print("Large file detected - loading up to 1,000,000 rows")
+            df = pd.read_csv(data_file, nrows=1000000, **csv_options)
+        else:
+            df = pd.read_csv(data_file, **csv_options)
+    print(f"Loaded {len(df):,} AIB records from {data_file.suffix[1:].upper()}")
 
-# Parse dates if not already done
-if 'ALARM_START' in df.columns and df['ALARM_START'].dtype == 'object':
-    df['ALARM_START'] = pd.to_datetime(df['ALARM_START'], errors='coerce')
-if 'ALARM_END' in df.columns and df['ALARM_END'].dtype == 'object':
-    df['ALARM_END'] = pd.to_datetime(df['ALARM_END'], errors='coerce')
+def parse_timestamps(values):
+    """Parse timestamp text to UTC datetimes on pandas' ISO 8601 fast path.
 
-# Use ALARM_DURATION_MINUTES if available
-if 'ALARM_DURATION_MINUTES' in df.columns:
+    The bq CLI writes '2025-02-01 06:30:00 UTC'; the ' UTC' suffix isn't ISO
+    8601, so it is stripped first rather than falling back to per-value
+    format inference.
+    """
+    return pd.to_datetime(values.str.removesuffix(' UTC'), format='ISO8601', errors='coerce', utc=True)
+
+# Parse dates if not already done (the local data files keep ALARM_START as text)
+for name in ('ALARM_START', 'ALARM_END'):
+    if name in df.columns and not pd.api.types.is_datetime64_any_dtype(df[name]):
+        df[name] = parse_timestamps(df[name])
+
+# Minutes are derived here in one vectorized pass rather than selected from BigQuery
+if 'ALARM_DURATION_SECONDS' in df.columns:
+    seconds = pd.to_numeric(df['ALARM_DURATION_SECONDS'], errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+    df['Duration_mins'] = np.round(seconds * (1.0 / 60.0), 2).astype(np.float32)
+elif 'ALARM_DURATION_MINUTES' in df.columns:
     df['Duration_mins'] = pd.to_numeric(df['ALARM_DURATION_MINUTES'], errors='coerce').fillna(0)
-elif 'ALARM_DURATION_SECONDS' in df.columns:
-    df['Duration_mins'] = pd.to_numeric(df['ALARM_DURATION_SECONDS'], errors='coerce').fillna(0) / 60
 else:
     df['Duration_mins'] = 0
 
-# Fix CELLNAME - prefix with 'AIB' if it's just a number
+# Fix CELLNAME - prefix with 'AIB' if it's just a number (the BigQuery query
+# already prefixes; the local data file has bare cell numbers)
 if 'CELLNAME' in df.columns:
-    df['CELLNAME'] = df['CELLNAME'].apply(lambda x: f'AIB{x}' if str(x).isdigit() else str(x))
+    cells = df['CELLNAME'].astype(str)
+    df['CELLNAME'] = cells.where(~cells.str.isdigit(), 'AIB' + cells)
+
+def column(name, default):
+    """df[name], or a column of default if the source didn't provide it."""
+    return df[name] if name in df.columns else pd.Series(default, index=df.index)
+
+# A few hundred distinct values over up to 1.5M rows - as categories the
+# groupbys below hash small integer codes instead of Python strings
+for name in ('SITE', 'CELLNAME', 'COMPONENT', 'ALARMTEXT'):
+    df[name] = column(name, '').fillna('').astype(str).astype('category')
+
+# Raw alarms from the local file - roll up to the same grain as the BigQuery query
+if 'INCIDENTS' not in df.columns:
+    alarm_starts = df['ALARM_START']
+    if alarm_starts.dt.tz is not None:
+        alarm_starts = alarm_starts.dt.tz_localize(None)
+    df['ALARM_DATE'] = alarm_starts.dt.normalize()
+    for name in ('BLOCKING', 'STARVING'):
+        df[name] = column(name, False).fillna(False).astype(bool)
+    df = df.groupby(INCIDENT_GRAIN, observed=True, dropna=False, sort=False).agg(
+        INCIDENTS=('Duration_mins', 'size'),
+        Duration_mins=('Duration_mins', 'sum')
+    ).reset_index()
+    print(f"Rolled up to {len(df):,} incident groups")
+df['Duration_mins'] = df['Duration_mins'].astype('float64').round(2)
+
+# Calculate metrics - each row stands for INCIDENTS alarms. One groupby pass
+# per breakdown; the totals and the cell/component tables below are all
+# derived from these small aggregates instead of re-scanning df
+cell_comp_stats = df.groupby(['CELLNAME', 'COMPONENT'], observed=True, sort=False).agg(
+    Incidents=('INCIDENTS', 'sum'),
+    Total_Duration=('Duration_mins', 'sum')
+)
+flag_counts = df.groupby(['BLOCKING', 'STARVING'], sort=False)['INCIDENTS'].sum()
+total_incidents = int(cell_comp_stats['Incidents'].sum())
+total_downtime = cell_comp_stats['Total_Duration'].sum()
+avg_downtime = total_downtime / total_incidents if total_incidents > 0 else 0
+total_blocking = int(flag_counts[flag_counts.index.get_level_values('BLOCKING').astype(bool)].sum())
+total_starving = int(flag_counts[flag_counts.index.get_level_values('STARVING').astype(bool)].sum())
+
+# Distinct values for the summary and the filters - SITE and CELLNAME are
+# categories, so these come from the categories rather than a column scan
+all_sites = sorted(df['SITE'].cat.categories.tolist())
+all_cells = sorted(df['CELLNAME'].cat.categories.tolist())
 
 print(f"\nData Summary:")
-print(f"  Date Range: {df['ALARM_START'].min()} to {df['ALARM_START'].max()}")
-print(f"  Sites: {', '.join(df['SITE'].unique().tolist()[:10])}{'...' if len(df['SITE'].unique()) > 10 else ''}")
-print(f"  Unique Cells: {df['CELLNAME'].nunique()}")
-print(f"  Total Downtime: {df['Duration_mins'].sum():,.1f} mins ({df['Duration_mins'].sum()/60:,.1f} hours)")
-
-# Calculate metrics
-total_incidents = len(df)
-total_downtime = df['Duration_mins'].sum()
-avg_downtime = df['Duration_mins'].mean() if total_incidents > 0 else 0
+print(f"  Date Range: {df['ALARM_DATE'].min()} to {df['ALARM_DATE'].max()}")
+print(f"  Sites: {', '.join(all_sites[:10])}{'...' if len(all_sites) > 10 else ''}")
+print(f"  Unique Cells: {len(all_cells)}")
+print(f"  Total Downtime: {total_downtime:,.1f} mins ({total_downtime/60:,.1f} hours)")
 
 # Get date range
-min_date = df['ALARM_START'].min()
-max_date = df['ALARM_START'].max()
+min_date = df['ALARM_DATE'].min()
+max_date = df['ALARM_DATE'].max()
 date_range = f"{min_date.strftime('%B %d, %Y')} - {max_date.strftime('%B %d, %Y')}" if pd.notna(min_date) else "Unknown"
 min_date_str = min_date.strftime('%Y-%m-%d') if pd.notna(min_date) else ''
 max_date_str = max_date.strftime('%Y-%m-%d') if pd.notna(max_date) else ''
 
 # Analyze by cell
-if 'CELLNAME' in df.columns:
-    cell_stats = df.groupby('CELLNAME').agg(
-        Incidents=('CELLNAME', 'count'),
-        Total_Duration=('Duration_mins', 'sum')
-    ).sort_values('Incidents', ascending=False).head(15)
-    print(f"\nTop 5 AIB Cells:")
-    for cell, row in cell_stats.head(5).iterrows():
-        print(f"  {cell}: {row['Incidents']:,} incidents, {row['Total_Duration']:,.1f} mins")
+cell_stats = cell_comp_stats.groupby(level='CELLNAME', observed=True, sort=False).sum().nlargest(15, 'Incidents')
+print(f"\nTop 5 AIB Cells:")
+for cell, row in cell_stats.head(5).iterrows():
+    print(f"  {cell}: {row['Incidents']:,} incidents, {row['Total_Duration']:,.1f} mins")
 
 # Analyze by component
-if 'COMPONENT' in df.columns:
-    comp_stats = df['COMPONENT'].value_counts().head(15)
-    print(f"\nTop 5 Components:")
-    for comp, count in comp_stats.head(5).items():
-        print(f"  {comp}: {count:,} incidents")
-
-# Get unique values for filters
-all_sites = sorted(df['SITE'].unique().tolist()) if 'SITE' in df.columns else []
-all_cells = sorted(df['CELLNAME'].unique().tolist()) if 'CELLNAME' in df.columns else []
-
-# Calculate Walmart week
-def get_walmart_week(date_str):
-    if pd.isna(date_str):
-        return None
-    try:
-        if isinstance(date_str, str):
-            date = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-        else:
-            date = date_str
-        fy_start = datetime(2025, 2, 1)
-        days_diff = (date.replace(tzinfo=None) - fy_start).days
-        week_num = (days_diff // 7) + 1
-        if week_num > 52:
-            return f"W{week_num - 52:02d}"
-        return f"W{week_num:02d}"
-    except:
-        return None
-
-df['WM_WEEK'] = df['ALARM_START'].apply(get_walmart_week)
-all_wm_weeks = sorted([w for w in df['WM_WEEK'].unique() if w], reverse=True)
+comp_stats = cell_comp_stats.groupby(level='COMPONENT', observed=True, sort=False)['Incidents'].sum().nlargest(15)
+print(f"\nTop 5 Components:")
+for comp, count in comp_stats.head(5).items():
+    print(f"  {comp}: {count:,} incidents")
+
+# Calculate Walmart week, counted from the FY start on the alarm's (wall-clock)
+# date. There are only ~DAYS_BACK distinct dates, so each date's label is
+# computed once and broadcast to the rows through the factorized date codes
+date_codes, dates = pd.factorize(df['ALARM_DATE'])
+week_num = (dates - WM_FY_START).days // 7 + 1
+week_num = np.where(week_num > 52, week_num - 52, week_num)
+week_labels = np.array([f"W{week:02d}" for week in week_num] + [None], dtype=object)
+df['WM_WEEK'] = week_labels[date_codes]  # code -1 (no date) picks the trailing None
+all_wm_weeks = sorted(set(week_labels[:-1]), reverse=True)
 print(f"\nWalmart Weeks: {', '.join(all_wm_weeks)}")
 
 # Prepare raw data for JavaScript
 print("\nPreparing data for dashboard...")
-raw_incidents = []
-for _, row in df.iterrows():
-    incident = {
-        'site': str(row.get('SITE', '')),
-        'cell': str(row.get('CELLNAME', '')),
-        'component': str(row.get('COMPONENT', '')),
-        'alarm_text': str(row.get('ALARMTEXT', ''))[:200],
-        'alarm_start': row['ALARM_START'].isoformat() if pd.notna(row.get('ALARM_START')) else None,
-        'duration_mins': float(row['Duration_mins']) if pd.notna(row.get('Duration_mins')) else 0,
-        'wm_week': row.get('WM_WEEK', None),
-        'blocking': bool(row.get('BLOCKING', False)) if pd.notna(row.get('BLOCKING')) else False,
-        'starving': bool(row.get('STARVING', False)) if pd.notna(row.get('STARVING')) else False,
-        'driveway': str(row.get('EQUIPMENT_DRIVEWAY', '')) if pd.notna(row.get('EQUIPMENT_DRIVEWAY')) else ''
-    }
-    raw_incidents.append(incident)
 
-print(f"Embedded {len(raw_incidents):,} incidents")
+def encode_labels(values):
+    """Dictionary-encode values as (int32 codes, label list); missing values get code -1."""
+    codes, labels = pd.factorize(values)
+    return codes.astype(np.int32), [str(label) for label in labels]
+
+# Column-oriented payload: each text column is sent once as a label list plus
+# an int code per incident group, instead of repeating strings in every record.
+# The per-group columns are written as binary buffers (see encode_json), so
+# their dtypes here are the typed arrays the page reads them into
+incident_columns = {}
+incident_labels = {}
+for key, values in (('site', df['SITE']), ('cell', df['CELLNAME']), ('component', df['COMPONENT']),
+                    ('alarm_text', df['ALARMTEXT']), ('wm_week', df['WM_WEEK'])):
+    incident_columns[key], incident_labels[key] = encode_labels(values)
+# Both queries truncate alarm text to 200 characters; older local files may not
+# be, so cap the (few hundred) labels rather than every row
+incident_labels['alarm_text'] = [label[:200] for label in incident_labels['alarm_text']]
+# Chart/insight display form, shared by all rows with the same alarm text
+incident_labels['alarm_text_short'] = [t if len(t) <= 50 else t[:50] + '...' for t in incident_labels['alarm_text']]
+incident_columns['alarm_date'] = date_codes.astype(np.int32)
+incident_labels['alarm_date'] = dates.strftime('%Y-%m-%d').tolist()
+incident_columns['duration_mins'] = df['Duration_mins'].fillna(0).to_numpy(dtype=np.float64)
+incident_columns['blocking'] = df['BLOCKING'].fillna(False).to_numpy(dtype=np.uint8)
+incident_columns['starving'] = df['STARVING'].fillna(False).to_numpy(dtype=np.uint8)
+incident_columns['n'] = df['INCIDENTS'].to_numpy(dtype=np.int32)
+incident_columns['labels'] = incident_labels
+
+# Weekly insights for a single week with no other filter, precomputed here so
+# the page can show them without scanning the week's rows. Alarms are keyed by
+# the page's deduplicated alarm id (first-seen order of the capped labels), and
+# rankings break ties by first appearance in the rows, as the page's ranked() does
+alarm_ids, _ = pd.factorize(pd.Series(incident_labels['alarm_text']))
+text_codes = incident_columns['alarm_text']
+insight_rows = pd.DataFrame({
+    'week': incident_columns['wm_week'],
+    'alarm': np.where(text_codes >= 0, alarm_ids[text_codes], 0),
+    'cell': incident_columns['cell'],
+    'downtime': incident_columns['duration_mins'],
+    'n': incident_columns['n'],
+    'blocking': incident_columns['blocking'].astype(bool),
+    'starving': incident_columns['starving'].astype(bool),
+})
+insight_rows = insight_rows[insight_rows['week'] >= 0]
+
+def top_by_week(rows, key, columns, k):
+    """Top k values of key per week by the sum of columns[0], as {week code: [[key, *column sums], ...]}."""
+    totals = rows.groupby(['week', key], sort=False)[columns].sum()
+    top = totals.sort_values(columns[0], ascending=False, kind='stable').groupby(level='week', sort=False).head(k)
+    result = {}
+    for (week, id_), *sums in zip(top.index.tolist(), *(top[c].tolist() for c in columns)):
+        result.setdefault(week, []).append([id_, *sums])
+    return result
+
+top_loss = top_by_week(insight_rows, 'alarm', ['downtime', 'n'], 3)
+top_blocking = top_by_week(insight_rows[insight_rows['blocking']], 'alarm', ['n'], 3)
+top_starving = top_by_week(insight_rows[insight_rows['starving']], 'alarm', ['n'], 3)
+flag_totals = insight_rows.assign(
+    blocking=insight_rows['n'] * insight_rows['blocking'],
+    starving=insight_rows['n'] * insight_rows['starving'],
+).groupby('week', sort=False)[['blocking', 'starving']].sum()
+top_cell = top_by_week(insight_rows, 'cell', ['downtime', 'n'], 1)
+top_cell_code = pd.Series({week: cells[0][0] for week, cells in top_cell.items()})
+in_top_cell = insight_rows['cell'].to_numpy() == top_cell_code.reindex(insight_rows['week']).to_numpy()
+top_cell_alarms = top_by_week(insight_rows[in_top_cell], 'alarm', ['n'], 3)
+
+weekly_summaries = {
+    incident_labels['wm_week'][week]: {
+        'topLoss': top_loss.get(week, []),
+        'topBlocking': top_blocking.get(week, []),
+        'blockingTotal': int(flag_totals.at[week, 'blocking']),
+        'topStarving': top_starving.get(week, []),
+        'starvingTotal': int(flag_totals.at[week, 'starving']),
+        'topCell': top_cell[week][0],
+        'topCellAlarms': top_cell_alarms.get(week, []),
+    }
+    for week in top_cell
+}
+
+def encode_json(value):
+    """JSON bytes for value. NumPy arrays become a base64 string of their little-endian
+    buffer, which the page views as the matching typed array without parsing numbers."""
+    if isinstance(value, np.ndarray):
+        value = base64.b64encode(np.ascontiguousarray(value, dtype=value.dtype.newbyteorder('<')).tobytes()).decode('ascii')
+    if HAS_ORJSON:
+        return orjson.dumps(value)
+    return json.dumps(value).encode('utf-8')
+
+def write_json_object(f, fields):
+    """Write the dict fields to the binary file f as one JSON object, encoding one field at a time."""
+    f.write(b'{')
+    for i, (name, value) in enumerate(fields.items()):
+        if i:
+            f.write(b',')
+        f.write(encode_json(name) + b':')
+        f.write(encode_json(value))
+    f.write(b'}')
+
+print(f"Embedded {len(df):,} incident groups ({total_incidents:,} alarms)")
 
 # Generate timestamp
 generated_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
@@ -189,31 +433,24 @@ generated_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 # Create HTML
 print("\nGenerating AIB Dashboard HTML...")
 
-html_content = f'''<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>AIB Symbotic Dashboard</title>
-    <script src="https://cdn.jsdelivr.net/npm/chart.js@4.4.0/dist/chart.umd.min.js"></script>
-    <script src="https://cdn.sheetjs.com/xlsx-0.20.1/package/dist/xlsx.full.min.js"></script>
-    <style>
-        * {{ margin: 0; padding: 0; box-sizing: border-box; }}
-        body {{
+# Static page styles - kept out of the page f-string so the braces need no
+# escaping and only the data-dependent parts are formatted each run
+DASHBOARD_CSS = '''        * { margin: 0; padding: 0; box-sizing: border-box; }
+        body {
             font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
             background: linear-gradient(135deg, #e8f4fc 0%, #c3dff0 100%);
             padding: 20px;
             color: #262730;
-        }}
-        .container {{
+        }
+        .container {
             max-width: 1600px;
             margin: 0 auto;
             background: white;
             border-radius: 10px;
             box-shadow: 0 10px 40px rgba(0,113,206,0.15);
             padding: 30px;
-        }}
-        .header {{
+        }
+        .header {
             text-align: center;
             margin-bottom: 30px;
             padding-bottom: 20px;
@@ -223,79 +460,79 @@ html_content = f'''<!DOCTYPE html>
             padding: 30px;
             border-radius: 10px 10px 0 0;
             color: white;
-        }}
-        .header h1 {{
+        }
+        .header h1 {
             font-size: 2.5rem;
             margin-bottom: 10px;
-        }}
-        .header .subtitle {{
+        }
+        .header .subtitle {
             opacity: 0.9;
             font-size: 1.1rem;
-        }}
-        .metrics-grid {{
+        }
+        .metrics-grid {
             display: grid;
             grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
             gap: 15px;
             margin-bottom: 30px;
-        }}
-        .metric-card {{
+        }
+        .metric-card {
             background: linear-gradient(135deg, #0071CE 0%, #005299 100%);
             color: white;
             padding: 20px;
             border-radius: 10px;
             box-shadow: 0 4px 6px rgba(0,0,0,0.1);
             text-align: center;
-        }}
-        .metric-card.blocking {{
+        }
+        .metric-card.blocking {
             background: linear-gradient(135deg, #ea1100 0%, #b80d00 100%);
-        }}
-        .metric-card.starving {{
+        }
+        .metric-card.starving {
             background: linear-gradient(135deg, #FFC220 0%, #cc9a1a 100%);
             color: #333;
-        }}
-        .metric-label {{
+        }
+        .metric-label {
             font-size: 0.85rem;
             opacity: 0.9;
             margin-bottom: 8px;
-        }}
-        .metric-value {{
+        }
+        .metric-value {
             font-size: 2rem;
             font-weight: bold;
-        }}
-        .filters-section {{
+        }
+        .filters-section {
             background: #f0f7ff;
             padding: 20px;
             border-radius: 8px;
             margin-bottom: 30px;
             border: 2px solid #0071CE;
-        }}
-        .filters-section h3 {{
+        }
+        .filters-section h3 {
             color: #0071CE;
             margin-bottom: 15px;
-        }}
-        .filter-row {{
+        }
+        .filter-row {
             display: grid;
             grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
             gap: 15px;
             margin-bottom: 15px;
-        }}
-        .filter-group {{
+        }
+        .filter-group {
             display: flex;
             flex-direction: column;
-        }}
-        .filter-group label {{
+        }
+        .filter-group label {
             font-weight: 600;
             margin-bottom: 5px;
             color: #333;
             font-size: 0.9rem;
-        }}
-        .filter-group select, .filter-group input {{
+        }
+        .filter-group select, .filter-group input {
             padding: 10px;
             border: 1px solid #0071CE;
             border-radius: 5px;
             font-size: 0.95rem;
-        }}
-        .btn {{
+        }
+        .btn {
             padding: 10px 20px;
             border: none;
             border-radius: 5px;
@@ -303,99 +540,99 @@ html_content = f'''<!DOCTYPE html>
             font-weight: 600;
             cursor: pointer;
             transition: all 0.3s;
-        }}
-        .btn-primary {{
+        }
+        .btn-primary {
             background: #0071CE;
             color: white;
-        }}
-        .btn-primary:hover {{
+        }
+        .btn-primary:hover {
             background: #005a9c;
             transform: translateY(-2px);
-        }}
-        .chart-section {{
+        }
+        .chart-section {
             margin-bottom: 30px;
-        }}
-        .chart-section h2 {{
+        }
+        .chart-section h2 {
             color: #0071CE;
             margin-bottom: 15px;
             padding-bottom: 10px;
             border-bottom: 2px solid #e0e0e0;
-        }}
-        .chart-container {{
+        }
+        .chart-container {
             background: white;
             padding: 20px;
             border-radius: 8px;
             box-shadow: 0 2px 8px rgba(0,0,0,0.08);
             margin-bottom: 20px;
-        }}
-        .insights-grid {{
+        }
+        .insights-grid {
             display: grid;
             grid-template-columns: repeat(auto-fit, minmax(300px, 1fr));
             gap: 20px;
             margin-bottom: 30px;
-        }}
-        .insight-card {{
+        }
+        .insight-card {
             background: #f8fbff;
             border-radius: 10px;
             padding: 20px;
             border: 2px solid #0071CE;
-        }}
-        .insight-card h3 {{
+        }
+        .insight-card h3 {
             color: #0071CE;
             margin-bottom: 15px;
             font-size: 1.1rem;
-        }}
-        .insight-card.blocking {{
+        }
+        .insight-card.blocking {
             border-color: #ea1100;
             background: #fff8f8;
-        }}
-        .insight-card.blocking h3 {{
+        }
+        .insight-card.blocking h3 {
             color: #ea1100;
-        }}
-        .insight-card.starving {{
+        }
+        .insight-card.starving {
             border-color: #FFC220;
             background: #fffdf5;
-        }}
-        .insight-card.starving h3 {{
+        }
+        .insight-card.starving h3 {
             color: #996b00;
-        }}
-        .alarm-item {{
+        }
+        .alarm-item {
             padding: 10px;
             margin-bottom: 8px;
             background: white;
             border-radius: 6px;
             border-left: 4px solid #0071CE;
             font-size: 0.9rem;
-        }}
-        .alarm-item.blocking {{
+        }
+        .alarm-item.blocking {
             border-left-color: #ea1100;
-        }}
-        .alarm-item.starving {{
+        }
+        .alarm-item.starving {
             border-left-color: #FFC220;
-        }}
-        table {{
+        }
+        table {
             width: 100%;
             border-collapse: collapse;
-        }}
-        th, td {{
+        }
+        th, td {
             padding: 12px;
             text-align: left;
             border-bottom: 1px solid #ddd;
-        }}
-        th {{
+        }
+        th {
             background: #0071CE;
             color: white;
-        }}
-        tr:hover {{ background: #f5f9ff; }}
-        .update-info {{
+        }
+        tr:hover { background: #f5f9ff; }
+        .update-info {
             text-align: center;
             color: #666;
             font-size: 0.9rem;
             margin-top: 30px;
             padding-top: 20px;
             border-top: 1px solid #eee;
-        }}
-        .filter-status {{
+        }
+        .filter-status {
             margin-top: 10px;
             padding: 10px;
             background: #d4edda;
@@ -403,23 +640,64 @@ html_content = f'''<!DOCTYPE html>
             color: #155724;
             font-weight: 600;
             text-align: center;
-        }}
-        .recommendation {{
+        }
+        .recommendation {
             padding: 12px;
             margin-bottom: 10px;
             border-radius: 8px;
             border-left: 4px solid #2a8703;
             background: #f0fff0;
-        }}
-        .recommendation.high {{
+        }
+        .recommendation.high {
             border-left-color: #ea1100;
             background: #fff5f5;
-        }}
-        .recommendation.medium {{
+        }
+        .recommendation.medium {
             border-left-color: #FFC220;
             background: #fffbf0;
-        }}
-    </style>
+        }
+'''
+
+DASHBOARD_JS = DASHBOARD_JS_FILE.read_text(encoding='utf-8')
+
+# The only run-specific values the page script needs beyond the incident data.
+# initComponents is the unfiltered Pareto the component chart opens with
+dashboard_meta = json.dumps({
+    'minDate': min_date_str,
+    'maxDate': max_date_str,
+    'initComponents': {
+        'labels': [str(comp) for comp in comp_stats.index],
+        'counts': comp_stats.tolist(),
+        'cumulativePcts': (comp_stats.cumsum() / comp_stats.sum() * 100).tolist() if comp_stats.sum() else [0] * len(comp_stats),
+    },
+    'metrics': {
+        'total': f"{total_incidents:,}",
+        'downtime': f"{total_downtime/60:,.1f}",
+        'blocking': f"{total_blocking:,}",
+        'starving': f"{total_starving:,}",
+        'avg': f"{avg_downtime:.2f}",
+    },
+})
+
+def filter_options(values):
+    """<option> markup for a filter dropdown, one per value, HTML-escaped."""
+    return '\n'.join(
+        f'<option value="{html.escape(str(v), quote=True)}">{html.escape(str(v))}</option>'
+        for v in values
+    )
+
+# The page is written in three parts - head, incident payload, tail - so the
+# payload is streamed to disk rather than formatted into one giant string
+html_head = f'''<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>AIB Symbotic Dashboard</title>
+    <script src="https://cdn.jsdelivr.net/npm/chart.js@4.4.0/dist/chart.umd.min.js"></script>
+    <script src="https://cdn.sheetjs.com/xlsx-0.20.1/package/dist/xlsx.full.min.js"></script>
+    <style>
+{DASHBOARD_CSS}    </style>
 </head>
 <body>
     <div class="container">
@@ -438,21 +716,21 @@ html_content = f'''<!DOCTYPE html>
                     <label for="wmWeekFilter">Walmart Week:</label>
                     <select id="wmWeekFilter">
                         <option value="ALL">All Weeks</option>
-                        {chr(10).join([f'<option value="{wk}">{wk}</option>' for wk in all_wm_weeks])}
+                        {filter_options(all_wm_weeks)}
                     </select>
                 </div>
                 <div class="filter-group">
                     <label for="siteFilter">Site/DC:</label>
                     <select id="siteFilter" multiple size="5">
                         <option value="ALL" selected>All Sites</option>
-                        {chr(10).join([f'<option value="{site}">{site}</option>' for site in all_sites])}
+                        {filter_options(all_sites)}
                     </select>
                 </div>
                 <div class="filter-group">
                     <label for="cellFilter">Cell:</label>
                     <select id="cellFilter" multiple size="5">
                         <option value="ALL" selected>All Cells</option>
-                        {chr(10).join([f'<option value="{cell}">{cell}</option>' for cell in all_cells])}
+                        {filter_options(all_cells)}
                     </select>
                 </div>
                 <div class="filter-group">
@@ -490,11 +768,11 @@ html_content = f'''<!DOCTYPE html>
             </div>
             <div class="metric-card blocking">
                 <div class="metric-label">Blocking Alarms</div>
-                <div class="metric-value" id="metricBlocking">{df['BLOCKING'].sum() if 'BLOCKING' in df.columns else 0:,}</div>
+                <div class="metric-value" id="metricBlocking">{total_blocking:,}</div>
             </div>
             <div class="metric-card starving">
                 <div class="metric-label">Starving Alarms</div>
-                <div class="metric-value" id="metricStarving">{df['STARVING'].sum() if 'STARVING' in df.columns else 0:,}</div>
+                <div class="metric-value" id="metricStarving">{total_starving:,}</div>
             </div>
             <div class="metric-card">
                 <div class="metric-label">Avg Duration (mins)</div>
@@ -587,562 +865,16 @@ html_content = f'''<!DOCTYPE html>
 
         <div class="update-info">
             AIB Dashboard generated from BigQuery: wmt-edw-sandbox.SYMBOTIC_DATA.snowflake_alarms<br>
-            {len(df):,} AIB alarms analyzed | Built with Code Puppy 🐶
+            {total_incidents:,} AIB alarms analyzed | Built with Code Puppy 🐶
         </div>
     </div>
 
     <script>
-        const rawIncidents = {json.dumps(raw_incidents)};
-        
-        let cellChart = null;
-        let componentChart = null;
-        let alarmChart = null;
-        let selectedCell = null;
-        let selectedComponent = null;
-        let lastFilteredData = null;
-        
-        // Calculate cumulative percentages for Pareto
-        function calculateCumulativePercentages(values) {{
-            const total = values.reduce((sum, val) => sum + val, 0);
-            if (total === 0) return values.map(() => 0);
-            let cumSum = 0;
-            return values.map(val => {{
-                cumSum += val;
-                return (cumSum / total) * 100;
-            }});
-        }}
-        
-        // Handle cell bar click — drill down into components + alarm types
-        function onCellBarClick(event, elements) {{
-            if (!elements || elements.length === 0) return;
-            const idx = elements[0].index;
-            const clickedCell = cellChart.data.labels[idx];
-            
-            // Toggle: if same cell clicked again, clear selection
-            if (selectedCell === clickedCell) {{
-                clearCellSelection();
-                return;
-            }}
-            
-            selectedCell = clickedCell;
-            // Clear component selection when switching cells
-            clearComponentSelection();
-            
-            const data = lastFilteredData || rawIncidents;
-            const cellData = data.filter(inc => inc.cell === selectedCell);
-            
-            // Highlight selected bar
-            const colors = cellChart.data.labels.map(label =>
-                label === selectedCell ? '#FFC220' : '#0071CE'
-            );
-            cellChart.data.datasets[0].backgroundColor = colors;
-            cellChart.update();
-            
-            // Update components chart for selected cell
-            updateComponentsForCell(cellData);
-            updateAlarmsForCell(cellData);
-            
-            // Show badge
-            document.getElementById('cellFilterBadge').style.display = 'inline-flex';
-            document.getElementById('cellFilterLabel').textContent = selectedCell;
-            document.getElementById('compChartCellLabel').textContent = '\u2014 ' + selectedCell;
-            document.getElementById('alarmChartCellLabel').textContent = '\u2014 ' + selectedCell;
-        }}
-        
-        function clearCellSelection() {{
-            selectedCell = null;
-            const data = lastFilteredData || rawIncidents;
-            
-            // Reset bar colors
-            if (cellChart) {{
-                cellChart.data.datasets[0].backgroundColor = '#0071CE';
-                cellChart.update();
-            }}
-            
-            // Also clear component selection when cell changes
-            clearComponentSelection();
-            
-            // Reset components + alarms to full data
-            updateComponentsForCell(data);
-            updateAlarmsForCell(data);
-            
-            // Hide badge
-            document.getElementById('cellFilterBadge').style.display = 'none';
-            document.getElementById('compChartCellLabel').textContent = '';
-            document.getElementById('alarmChartCellLabel').textContent = '';
-        }}
-        
-        function updateComponentsForCell(data) {{
-            const compCounts = {{}};
-            data.forEach(inc => {{
-                compCounts[inc.component] = (compCounts[inc.component] || 0) + 1;
-            }});
-            const sortedComps = Object.entries(compCounts).sort((a, b) => b[1] - a[1]).slice(0, 15);
-            const compValues = sortedComps.map(c => c[1]);
-            const cumulativePcts = calculateCumulativePercentages(compValues);
-            
-            if (componentChart) {{
-                componentChart.data.labels = sortedComps.map(c => c[0]);
-                componentChart.data.datasets[0].data = compValues;
-                componentChart.data.datasets[1].data = cumulativePcts;
-                // Preserve component highlight if selected
-                if (selectedComponent) {{
-                    componentChart.data.datasets[0].backgroundColor = sortedComps.map(c =>
-                        c[0] === selectedComponent ? '#FFC220' : '#0071CE'
-                    );
-                }} else {{
-                    componentChart.data.datasets[0].backgroundColor = '#0071CE';
-                }}
-                componentChart.update();
-            }}
-        }}
-        
-        function updateAlarmsForCell(data) {{
-            // If a component is selected, further filter by component
-            const filteredData = selectedComponent
-                ? data.filter(inc => inc.component === selectedComponent)
-                : data;
-            
-            const alarmCounts = {{}};
-            filteredData.forEach(inc => {{
-                const text = inc.alarm_text.length > 50 ? inc.alarm_text.substring(0, 50) + '...' : inc.alarm_text;
-                alarmCounts[text] = (alarmCounts[text] || 0) + 1;
-            }});
-            const sortedAlarms = Object.entries(alarmCounts).sort((a, b) => b[1] - a[1]).slice(0, 10);
-            
-            if (alarmChart) {{
-                alarmChart.data.labels = sortedAlarms.map(a => a[0]);
-                alarmChart.data.datasets[0].data = sortedAlarms.map(a => a[1]);
-                alarmChart.update();
-            }}
-        }}
-        
-        // Handle component bar click — drill down into alarm types
-        function onComponentBarClick(event, elements) {{
-            if (!elements || elements.length === 0) return;
-            // Only respond to clicks on the bar dataset (index 0), not the cumulative % line (index 1)
-            if (elements[0].datasetIndex !== 0) return;
-            
-            const idx = elements[0].index;
-            const clickedComp = componentChart.data.labels[idx];
-            
-            // Toggle: if same component clicked again, clear selection
-            if (selectedComponent === clickedComp) {{
-                clearComponentSelection();
-                return;
-            }}
-            
-            selectedComponent = clickedComp;
-            
-            // Highlight selected bar on component chart
-            const colors = componentChart.data.labels.map(label =>
-                label === selectedComponent ? '#FFC220' : '#0071CE'
-            );
-            componentChart.data.datasets[0].backgroundColor = colors;
-            componentChart.update();
-            
-       // Get the current working data (respects cell selection + filters)
-            const data = lastFilteredData || rawIncidents;
-            const drillData = selectedCell ? data.filter(inc => inc.cell === selectedCell) : data;
-            updateAlarmsForCell(drillData);
-            
-            // Show badge + labels
-            document.getElementById('compFilterBadge').style.display = 'inline-flex';
-            document.getElementById('compFilterLabel').textContent = selectedComponent;
-            document.getElementById('alarmChartCompLabel').textContent = '\u2014 ' + selectedComponent;
-        }}
-        
-        function clearComponentSelection() {{
-            selectedComponent = null;
-            
-            // Reset component bar colors
-            if (componentChart) {{
-                componentChart.data.datasets[0].backgroundColor = '#0071CE';
-                componentChart.update();
-            }}
-            
-            // Refresh alarms with full data (respecting cell selection)
-            const data = lastFilteredData || rawIncidents;
-            const drillData = selectedCell ? data.filter(inc => inc.cell === selectedCell) : data;
-            updateAlarmsForCell(drillData);
-            
-            // Hide badge + labels
-            document.getElementById('compFilterBadge').style.display = 'none';
-            document.getElementById('alarmChartCompLabel').textContent = '';
-        }}
-        
-        // Get previous Walmart week
-        function getPreviousWeek(weekStr) {{
-            if (!weekStr || weekStr === 'ALL') return null;
-            const weekNum = parseInt(weekStr.replace('W', ''));
-            if (weekNum <= 1) return 'W52';
-            return 'W' + String(weekNum - 1).padStart(2, '0');
-        }}
-        
-        // Apply filters
-        function applyFilters() {{
-            const selectedWeek = document.getElementById('wmWeekFilter').value;
-            const siteSelect = document.getElementById('siteFilter');
-            const selectedSites = Array.from(siteSelect.selectedOptions).map(opt => opt.value);
-            const cellSelect = document.getElementById('cellFilter');
-            const selectedCells = Array.from(cellSelect.selectedOptions).map(opt => opt.value);
-            const alarmType = document.getElementById('alarmTypeFilter').value;
-            const startDate = document.getElementById('startDate').value;
-            const endDate = document.getElementById('endDate').value;
-            
-            let filtered = rawIncidents.filter(inc => {{
-                if (selectedWeek !== 'ALL' && inc.wm_week !== selectedWeek) return false;
-                if (!selectedSites.includes('ALL') && !selectedSites.includes(inc.site)) return false;
-                if (!selectedCells.includes('ALL') && !selectedCells.includes(inc.cell)) return false;
-                if (alarmType === 'BLOCKING' && !inc.blocking) return false;
-                if (alarmType === 'STARVING' && !inc.starving) return false;
-                if (startDate && inc.alarm_start) {{
-                    const incDate = inc.alarm_start.substring(0, 10);
-                    if (incDate < startDate) return false;
-                }}
-                if (endDate && inc.alarm_start) {{
-                    const incDate = inc.alarm_start.substring(0, 10);
-                    if (incDate > endDate) return false;
-                }}
-                return true;
-            }});
-            
-            // Update metrics
-            const totalIncidents = filtered.length;
-            const totalDowntime = filtered.reduce((sum, inc) => sum + inc.duration_mins, 0);
-            const blockingCount = filtered.filter(inc => inc.blocking).length;
-            const starvingCount = filtered.filter(inc => inc.starving).length;
-            const avgDowntime = totalIncidents > 0 ? totalDowntime / totalIncidents : 0;
-            
-            document.getElementById('metricTotal').textContent = totalIncidents.toLocaleString();
-            document.getElementById('metricDowntime').textContent = (totalDowntime / 60).toFixed(1);
-            document.getElementById('metricBlocking').textContent = blockingCount.toLocaleString();
-            document.getElementById('metricStarving').textContent = starvingCount.toLocaleString();
-            document.getElementById('metricAvg').textContent = avgDowntime.toFixed(2);
-            
-            // Update charts
-            updateCharts(filtered);
-            updateTable(filtered);
-            
-            // Update insights if week selected
-            if (selectedWeek !== 'ALL') {{
-                updateWeeklyInsights(filtered, selectedWeek, selectedSites);
-            }} else {{
-                document.getElementById('weeklyInsightsSection').style.display = 'none';
-            }}
-            
-            // Show status
-            const status = document.getElementById('filterStatus');
-            status.style.display = 'block';
-            status.textContent = `Showing ${{totalIncidents.toLocaleString()}} alarms | ${{(totalDowntime/60).toFixed(1)}} hours downtime | ${{blockingCount.toLocaleString()}} blocking | ${{starvingCount.toLocaleString()}} starving`;
-        }}
-        
-        // Reset filters
-        function resetFilters() {{
-            document.getElementById('wmWeekFilter').value = 'ALL';
-            document.getElementById('alarmTypeFilter').value = 'ALL';
-            document.getElementById('startDate').value = '{min_date_str}';
-            document.getElementById('endDate').value = '{max_date_str}';
-            Array.from(document.getElementById('siteFilter').options).forEach(opt => opt.selected = opt.value === 'ALL');
-            Array.from(document.getElementById('cellFilter').options).forEach(opt => opt.selected = opt.value === 'ALL');
-            clearCellSelection();
-            
-            document.getElementById('metricTotal').textContent = '{total_incidents:,}';
-            document.getElementById('metricDowntime').textContent = '{total_downtime/60:,.1f}';
-            document.getElementById('metricBlocking').textContent = '{df["BLOCKING"].sum() if "BLOCKING" in df.columns else 0:,}';
-            document.getElementById('metricStarving').textContent = '{df["STARVING"].sum() if "STARVING" in df.columns else 0:,}';
-            document.getElementById('metricAvg').textContent = '{avg_downtime:.2f}';
-            
-            document.getElementById('weeklyInsightsSection').style.display = 'none';
-            document.getElementById('filterStatus').style.display = 'none';
-            
-            updateCharts(rawIncidents);
-            updateTable(rawIncidents);
-        }}
-        
-        // Update charts
-        function updateCharts(data) {{
-            lastFilteredData = data;
-            
-            // Cell chart
-            const cellCounts = {{}};
-            data.forEach(inc => {{
-                cellCounts[inc.cell] = (cellCounts[inc.cell] || 0) + 1;
-            }});
-            const sortedCells = Object.entries(cellCounts).sort((a, b) => b[1] - a[1]).slice(0, 15);
-            
-            if (cellChart) {{
-                cellChart.data.labels = sortedCells.map(c => c[0]);
-                cellChart.data.datasets[0].data = sortedCells.map(c => c[1]);
-                // Preserve highlight if a cell is selected
-                if (selectedCell) {{
-                    cellChart.data.datasets[0].backgroundColor = sortedCells.map(c =>
-                        c[0] === selectedCell ? '#FFC220' : '#0071CE'
-                    );
-                }} else {{
-                    cellChart.data.datasets[0].backgroundColor = '#0071CE';
-                }}
-                cellChart.update();
-            }}
-            
-            // If a cell is selected, only update components/alarms for that cell
-            const drillData = selectedCell ? data.filter(inc => inc.cell === selectedCell) : data;
-            updateComponentsForCell(drillData);
-            updateAlarmsForCell(drillData);
-        }}
-        
-        // Update table
-        function updateTable(data) {{
-            const cellStats = {{}};
-            data.forEach(inc => {{
-                if (!cellStats[inc.cell]) {{
-                    cellStats[inc.cell] = {{ count: 0, downtime: 0, blocking: 0, starving: 0 }};
-                }}
-                cellStats[inc.cell].count++;
-                cellStats[inc.cell].downtime += inc.duration_mins;
-                if (inc.blocking) cellStats[inc.cell].blocking++;
-                if (inc.starving) cellStats[inc.cell].starving++;
-            }});
-            
-            const sorted = Object.entries(cellStats).sort((a, b) => b[1].count - a[1].count).slice(0, 20);
-            
-            const tbody = document.getElementById('cellTableBody');
-            tbody.innerHTML = sorted.map((item, idx) => {{
-                const [cell, stats] = item;
-                const avg = stats.count > 0 ? (stats.downtime / stats.count).toFixed(2) : '0.00';
-                return `
-                    <tr>
-                        <td><strong>${{idx + 1}}</strong></td>
-                        <td>${{cell}}</td>
-                        <td>${{stats.count.toLocaleString()}}</td>
-                        <td>${{stats.downtime.toFixed(1)}}</td>
-                        <td style="color: #ea1100;">${{stats.blocking.toLocaleString()}}</td>
-                        <td style="color: #996b00;">${{stats.starving.toLocaleString()}}</td>
-                        <td>${{avg}}</td>
-                    </tr>
-                `;
-            }}).join('');
-        }}
-        
-        // Update weekly insights
-        function updateWeeklyInsights(data, selectedWeek, selectedSites) {{
-            const section = document.getElementById('weeklyInsightsSection');
-            section.style.display = 'block';
-            
-            document.getElementById('insightsWeekLabel').textContent = selectedWeek;
-            document.getElementById('insightsSiteLabel').textContent = selectedSites.includes('ALL') ? 'All Sites' : selectedSites.join(', ');
-            
-            // Top 3 Loss Alarms
-            const alarmDowntime = {{}};
-            data.forEach(inc => {{
-                if (!alarmDowntime[inc.alarm_text]) {{
-                    alarmDowntime[inc.alarm_text] = {{ downtime: 0, count: 0 }};
-                }}
-                alarmDowntime[inc.alarm_text].downtime += inc.duration_mins;
-                alarmDowntime[inc.alarm_text].count++;
-            }});
-            const topLoss = Object.entries(alarmDowntime).sort((a, b) => b[1].downtime - a[1].downtime).slice(0, 3);
-            document.getElementById('topLossAlarms').innerHTML = topLoss.map((item, idx) => {{
-                const [alarm, stats] = item;
-                const display = alarm.length > 50 ? alarm.substring(0, 50) + '...' : alarm;
-                return `<div class="alarm-item"><strong>#${{idx+1}}</strong> ${{display}}<br><small>${{stats.downtime.toFixed(0)}} mins | ${{stats.count}} occurrences</small></div>`;
-            }}).join('');
-            
-            // Top 3 Blocking
-            const blockingData = data.filter(inc => inc.blocking);
-            const blockingAlarms = {{}};
-            blockingData.forEach(inc => {{
-                blockingAlarms[inc.alarm_text] = (blockingAlarms[inc.alarm_text] || 0) + 1;
-            }});
-            const topBlocking = Object.entries(blockingAlarms).sort((a, b) => b[1] - a[1]).slice(0, 3);
-            document.getElementById('topBlockingAlarms').innerHTML = topBlocking.map((item, idx) => {{
-                const [alarm, count] = item;
-                const display = alarm.length > 50 ? alarm.substring(0, 50) + '...' : alarm;
-                return `<div class="alarm-item blocking"><strong>#${{idx+1}}</strong> ${{display}}<br><small>${{count}} blocking alarms</small></div>`;
-            }}).join('') || '<p style="color: #888;">No blocking alarms</p>';
-            
-            // Top 3 Starving
-            const starvingData = data.filter(inc => inc.starving);
-            const starvingAlarms = {{}};
-            starvingData.forEach(inc => {{
-                starvingAlarms[inc.alarm_text] = (starvingAlarms[inc.alarm_text] || 0) + 1;
-            }});
-            const topStarving = Object.entries(starvingAlarms).sort((a, b) => b[1] - a[1]).slice(0, 3);
-            document.getElementById('topStarvingAlarms').innerHTML = topStarving.map((item, idx) => {{
-                const [alarm, count] = item;
-                const display = alarm.length > 50 ? alarm.substring(0, 50) + '...' : alarm;
-                return `<div class="alarm-item starving"><strong>#${{idx+1}}</strong> ${{display}}<br><small>${{count}} starving alarms</small></div>`;
-            }}).join('') || '<p style="color: #888;">No starving alarms</p>';
-            
-            // Most impacted cell
-            const cellDowntime = {{}};
-            data.forEach(inc => {{
-                if (!cellDowntime[inc.cell]) {{
-                    cellDowntime[inc.cell] = {{ downtime: 0, count: 0, topAlarm: {{}} }};
-                }}
-                cellDowntime[inc.cell].downtime += inc.duration_mins;
-                cellDowntime[inc.cell].count++;
-                cellDowntime[inc.cell].topAlarm[inc.alarm_text] = (cellDowntime[inc.cell].topAlarm[inc.alarm_text] || 0) + 1;
-            }});
-            const sortedCells = Object.entries(cellDowntime).sort((a, b) => b[1].downtime - a[1].downtime);
-            
-            if (sortedCells.length > 0) {{
-                const [cellName, cellData] = sortedCells[0];
-                document.getElementById('mostImpactedCell').textContent = `${{cellName}} (${{cellData.downtime.toFixed(0)}} mins)`;
-                const cellTopAlarms = Object.entries(cellData.topAlarm).sort((a, b) => b[1] - a[1]).slice(0, 3);
-                document.getElementById('mostImpactedCellAlarms').innerHTML = cellTopAlarms.map((item, idx) => {{
-                    const [alarm, count] = item;
-                    const display = alarm.length > 45 ? alarm.substring(0, 45) + '...' : alarm;
-                    return `<div class="alarm-item"><strong>#${{idx+1}}</strong> ${{display}} <small>(${{count}}x)</small></div>`;
-                }}).join('');
-            }}
-            
-            // Recommendations
-            const recommendations = [];
-            if (topLoss.length > 0) {{
-                const [alarm, stats] = topLoss[0];
-                const short = alarm.length > 35 ? alarm.substring(0, 35) + '...' : alarm;
-                recommendations.push(`<div class="recommendation high">🚨 <strong>Fix:</strong> "${{short}}" - ${{stats.downtime.toFixed(0)}} mins lost</div>`);
-            }}
-            if (sortedCells.length > 0) {{
-                const [cellName, cellData] = sortedCells[0];
-                recommendations.push(`<div class="recommendation high">🏭 <strong>Focus:</strong> ${{cellName}} needs attention (${{cellData.count}} alarms)</div>`);
-            }}
-            if (topBlocking.length > 0) {{
-                recommendations.push(`<div class="recommendation medium">⛔ <strong>Blocking:</strong> ${{blockingData.length}} blocking alarms impacting flow</div>`);
-            }}
-            if (topStarving.length > 0) {{
-                recommendations.push(`<div class="recommendation medium">📉 <strong>Starving:</strong> ${{starvingData.length}} starving alarms - check upstream</div>`);
-            }}
-            document.getElementById('weeklyRecommendations').innerHTML = recommendations.join('');
-        }}
-        
-        // Initialize charts
-        function initCharts() {{
-            // Cell chart
-            const cellCounts = {{}};
-            rawIncidents.forEach(inc => {{
-                cellCounts[inc.cell] = (cellCounts[inc.cell] || 0) + 1;
-            }});
-            const sortedCells = Object.entries(cellCounts).sort((a, b) => b[1] - a[1]).slice(0, 15);
-            
-            cellChart = new Chart(document.getElementById('cellChart'), {{
-                type: 'bar',
-                data: {{
-                    labels: sortedCells.map(c => c[0]),
-                    datasets: [{{
-                        label: 'Incidents',
-                        data: sortedCells.map(c => c[1]),
-                        backgroundColor: '#0071CE',
-                        borderColor: '#005299',
-                        borderWidth: 1
-                    }}]
-                }},
-                options: {{
-                    responsive: true,
-                    maintainAspectRatio: false,
-                    plugins: {{ legend: {{ display: false }} }},
-                    scales: {{ y: {{ beginAtZero: true }} }},
-                    onClick: onCellBarClick,
-                    onHover: (event, elements) => {{
-                        event.native.target.style.cursor = elements.length ? 'pointer' : 'default';
-                    }}
-                }}
-            }});
-            
-            // Component chart (Pareto)
-            const compCounts = {{}};
-            rawIncidents.forEach(inc => {{
-                compCounts[inc.component] = (compCounts[inc.component] || 0) + 1;
-            }});
-            const sortedComps = Object.entries(compCounts).sort((a, b) => b[1] - a[1]).slice(0, 15);
-            const compValues = sortedComps.map(c => c[1]);
-            const cumulativePcts = calculateCumulativePercentages(compValues);
-            
-            componentChart = new Chart(document.getElementById('componentChart'), {{
-                type: 'bar',
-                data: {{
-                    labels: sortedComps.map(c => c[0]),
-                    datasets: [{{
-                        label: 'Incidents',
-                        data: compValues,
-                        backgroundColor: '#0071CE',
-                        borderWidth: 1,
-                        yAxisID: 'y'
-                    }}, {{
-                        label: 'Cumulative %',
-                        data: cumulativePcts,
-                        type: 'line',
-                        borderColor: '#FF6900',
-                        borderWidth: 3,
-                        pointRadius: 4,
-                        fill: false,
-                        yAxisID: 'y1'
-                    }}]
-                }},
-                options: {{
-                    responsive: true,
-                    maintainAspectRatio: false,
-                    scales: {{
-                        y: {{ beginAtZero: true, position: 'left' }},
-                        y1: {{ beginAtZero: true, position: 'right', max: 100, grid: {{ drawOnChartArea: false }} }}
-                    }},
-                    onClick: onComponentBarClick,
-                    onHover: (event, elements) => {{
-                        event.native.target.style.cursor = elements.length ? 'pointer' : 'default';
-                    }}
-                }}
-            }});
-            
-            // Alarm chart
-            const alarmCounts = {{}};
-            rawIncidents.forEach(inc => {{
-                const text = inc.alarm_text.length > 50 ? inc.alarm_text.substring(0, 50) + '...' : inc.alarm_text;
-                alarmCounts[text] = (alarmCounts[text] || 0) + 1;
-            }});
-            const sortedAlarms = Object.entries(alarmCounts).sort((a, b) => b[1] - a[1]).slice(0, 10);
-            
-            alarmChart = new Chart(document.getElementById('alarmChart'), {{
-                type: 'bar',
-                data: {{
-                    labels: sortedAlarms.map(a => a[0]),
-                    datasets: [{{
-                        label: 'Occurrences',
-                        data: sortedAlarms.map(a => a[1]),
-                        backgroundColor: '#FFC220',
-                        borderWidth: 1
-                    }}]
-                }},
-                options: {{
-                    responsive: true,
-                    maintainAspectRatio: false,
-                    indexAxis: 'y',
-                    plugins: {{ legend: {{ display: false }} }}
-                }}
-            }});
-            
-            // Initialize table
-            updateTable(rawIncidents);
-        }}
-        
-        // Event listeners
-        document.getElementById('wmWeekFilter').addEventListener('change', applyFilters);
-        document.getElementById('alarmTypeFilter').addEventListener('change', applyFilters);
-        
-        // Init
-        initCharts();
-        
-        // Auto-reload at 5:05 AM daily to pick up fresh BigQuery data
-        function scheduleAutoReload() {{
-            const now = new Date();
-            const target = new Date();
-            target.setHours(5, 5, 0, 0);
-            if (target <= now) target.setDate(target.getDate() + 1);
-            const msUntilReload = target - now;
-            console.log('[AIB Dashboard] Auto-reload scheduled in ' + Math.round(msUntilReload / 60000) + ' minutes (5:05 AM)');
-            setTimeout(() => location.reload(), msUntilReload);
-        }}
-        scheduleAutoReload();
+        const incidentData = '''
+html_tail = f''';
+        const dashboardMeta = {dashboard_meta};
+        const weeklySummaries = {json.dumps(weekly_summaries)};
+{DASHBOARD_JS}
     </script>
 </body>
 </html>
@@ -1150,8 +882,23 @@ html_content = f'''<!DOCTYPE html>
 
 # Write HTML file
 print(f"Writing dashboard to {OUTPUT_FILE}...")
-with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-    f.write(html_content)
+with open(OUTPUT_FILE, 'wb', buffering=1 << 20) as f:
+    f.write(html_head.encode('utf-8'))
+    write_json_object(f, incident_columns)
+    f.write(html_tail.encode('utf-8'))
+
+# The same incident groups as a columnar sidecar - a fraction of the embedded
+# JSON and readable straight from pandas, DuckDB or Power BI
+if HAS_PYARROW:
+    df[INCIDENT_GRAIN + ['WM_WEEK', 'INCIDENTS', 'Duration_mins']].to_parquet(
+        INCIDENTS_PARQUET_FILE, compression='zstd', index=False
+    )
+    print(f"Wrote incident groups to {INCIDENTS_PARQUET_FILE}")
+
+if data_fingerprint:
+    FINGERPRINT_FILE.write_text(data_fingerprint, encoding='utf-8')
+else:
+    FINGERPRINT_FILE.unlink(missing_ok=True)
 
 print("\n" + "="*70)
 print("AIB DASHBOARD GENERATED!")